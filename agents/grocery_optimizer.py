@@ -2,16 +2,29 @@
 Grocery Optimizer Agent
 
 Responsibilities:
-- Aggregate total required ingredients from the 7-day meal plan
+- Aggregate total required ingredients from the meal plan
+  (running totals as Quantity records; per-line provenance on request)
+- Update aggregated needs incrementally when a plan is rolled forward
 - Convert all units to base units (g, ml, pcs)
 - Subtract pantry quantities
-- Round missing quantities to nearest package size
+- Round missing quantities to the package mix with the least waste
+  (or the lowest cost, with minimize="cost")
 - Return optimized shopping list
+- Price the list against the user's budget and suggest meals to swap
+- Optional NumPy backend (utils/ingredient_matrix.py) for large plans
+- Async variants of each step for callers inside an event loop
 """
 
 from typing import Dict, Any, List
-from utils.conversions import convert_to_base
-from utils.normalizer import normalize_name
+from utils.normalizer import normalize_name_cached
+from utils.recipe_store import RecipeStore
+from utils.quantities import IngredientLine, Quantity
+from utils.ingredient_matrix import store_matrix
+from utils.packing import PackageTable
+
+# Totals left at or below this after subtracting dropped days are float
+# residue: the ingredient is no longer needed
+_EMPTY_QTY = 1e-9
 
 
 class GroceryOptimizerAgent:
@@ -28,97 +41,359 @@ class GroceryOptimizerAgent:
         "spinach": {"g": [100, 250]},
     }
 
+    # Price per package, same keys as PACKAGE_SIZES
+    PACKAGE_PRICES = {
+        "eggs": {"pcs": {6: 1.60, 12: 2.90}},
+        "milk": {"ml": {500: 0.70, 1000: 1.20}},
+        "rice": {"g": {500: 1.50, 1000: 2.60}},
+        "spinach": {"g": {100: 0.90, 250: 2.00}},
+    }
+
+    # Price per base unit for items bought loose (no package sizes)
+    UNIT_PRICES = {
+        "onion": {"pcs": 0.25},
+        "tomato": {"pcs": 0.30},
+        "potato": {"pcs": 0.20},
+        "carrot": {"pcs": 0.15},
+        "banana": {"pcs": 0.20},
+        "chicken": {"g": 0.009},
+        "paneer": {"g": 0.012},
+        "cheese": {"g": 0.011},
+        "mushroom": {"g": 0.008},
+        "yogurt": {"g": 0.004},
+        "pasta": {"g": 0.003},
+        "oats": {"g": 0.003},
+    }
+
+    BACKENDS = ("dict", "numpy")
+    OBJECTIVES = ("waste", "cost")
+
+    # Bound on memoized (ingredient, unit, need) → package mix results
+    PACK_CACHE_SIZE = 65536
+
+    def __init__(self, backend: str = "dict", recipes=None, minimize: str = "waste"):
+        """
+        backend: "dict" (default) or "numpy"
+        recipes: recipe list or RecipeStore / RecipeCatalog. Meals whose
+                 recipe_id is in it (ingredients unchanged) reuse its
+                 pre-normalized, base-unit lines; required when
+                 backend="numpy" (pre-encoded matrix)
+        minimize: "waste" (default) or "cost" — package mix objective;
+                  "cost" uses PACKAGE_PRICES and adds a cost to each item
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {self.BACKENDS}")
+        if minimize not in self.OBJECTIVES:
+            raise ValueError(f"Unknown objective {minimize!r}, expected one of {self.OBJECTIVES}")
+
+        self.backend = backend
+        self.minimize = minimize
+        self.store = None
+        self.matrix = None
+
+        if recipes is not None:
+            self.store = recipes if isinstance(recipes, RecipeStore) else RecipeStore(recipes)
+
+        if backend == "numpy":
+            if self.store is None:
+                raise ValueError("backend='numpy' needs the recipes to encode")
+            self.matrix = store_matrix(self.store)
+
+        # (ingredient, unit) → PackageTable, built once per optimizer.
+        # Priced tables (every size has a price) serve cost mode and pricing.
+        # Table keys are normalized like the aggregated names ("eggs" → "egg").
+        self.package_tables = {}
+        self.priced_tables = {}
+        for name, by_unit in self.PACKAGE_SIZES.items():
+            key = normalize_name_cached(name)
+            for unit, sizes in by_unit.items():
+                if not sizes:
+                    continue
+                self.package_tables[(key, unit)] = PackageTable(sizes)
+
+                prices = self.PACKAGE_PRICES.get(name, {}).get(unit, {})
+                if all(size in prices for size in sizes):
+                    self.priced_tables[(key, unit)] = PackageTable(sizes, prices)
+
+        self.unit_prices = {
+            normalize_name_cached(name): by_unit for name, by_unit in self.UNIT_PRICES.items()
+        }
+
+        self._pack_cache = {}
+
     # ----------------------------------------
     # Step 1: Aggregate all ingredients from meal plan
     # ----------------------------------------
-    def aggregate_ingredients(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+    def aggregate_ingredients(self, plan: Dict[str, Any],
+                              provenance: bool = False) -> Dict[str, Quantity]:
+        """
+        {name: Quantity} of base-unit totals over the plan.
+        provenance=True also keeps the contributing lines in Quantity.entries.
+        utils.quantities.aggregated_to_json gives the JSON shape.
+        """
+        if self.matrix is not None:
+            aggregated = self.matrix.aggregate(plan, provenance)
+            if aggregated is not None:
+                return aggregated
+            # recipes outside the matrix or edited meals → dict path
+
         aggregated = {}
 
         for day in plan.get("plan", []):
             for meal in day.get("meals", []):
-                for ing in meal.get("ingredients", []):
-                    name = normalize_name(ing["name"])
-                    qty = ing.get("qty", 1)
-                    unit = ing.get("unit", "pcs")
+                for line in self._meal_lines(meal):
+                    q = aggregated.get(line.name)
+                    if q is None:
+                        q = aggregated[line.name] = Quantity(
+                            0.0, line.unit, [] if provenance else None
+                        )
+                    q.add(line)
 
-                    qty_norm, unit_norm = convert_to_base(qty, unit)
+        return aggregated
 
-                    if name not in aggregated:
-                        aggregated[name] = {
-                            "qty_norm": 0.0,
-                            "unit_norm": unit_norm,
-                            "entries": []
-                        }
+    def update_aggregated(self, aggregated: Dict[str, Quantity],
+                          new_days: List[Dict[str, Any]],
+                          dropped_days: List[Dict[str, Any]] = ()) -> Dict[str, Quantity]:
+        """
+        aggregate_ingredients of a plan rolled forward by
+        MealPlannerAgent.extend_plan, from the previous plan's aggregated
+        needs: the new days are added, the dropped (leading) days
+        subtracted. Only the days that changed are aggregated.
 
-                    aggregated[name]["qty_norm"] += qty_norm
-                    aggregated[name]["entries"].append({"qty": qty, "unit": unit})
+        Returns a new dict; Quantities of untouched ingredients are shared
+        with `aggregated`, changed ones are copies. Provenance is kept if
+        `aggregated` has it.
+        """
+        provenance = any(q.entries is not None for q in aggregated.values())
+        updated = dict(aggregated)
 
-        return aggregated
+        def copy(name, q):
+            q = updated[name] = Quantity(q.qty, q.unit,
+                                         list(q.entries) if q.entries is not None else None)
+            return q
+
+        if dropped_days:
+            for name, gone in self.aggregate_ingredients({"plan": dropped_days}, provenance).items():
+                q = updated.get(name)
+                if q is None:
+                    continue
+                q = copy(name, q)
+                q.qty -= gone.qty
+                if q.entries is not None:
+                    # dropped days lead the plan, so their lines lead the entries
+                    del q.entries[:len(gone.entries)]
+                    if not q.entries:
+                        del updated[name]
+                        continue
+                if q.qty <= _EMPTY_QTY:
+                    del updated[name]
+
+        if new_days:
+            for name, added in self.aggregate_ingredients({"plan": new_days}, provenance).items():
+                q = updated.get(name)
+                if q is None:
+                    updated[name] = added
+                    continue
+                q = copy(name, q)
+                q.qty += added.qty
+                if q.entries is not None:
+                    q.entries.extend(added.entries)
+
+        return updated
+
+    def _meal_lines(self, meal: Dict[str, Any]):
+        """IngredientLines of a meal (from the store when it holds the meal's recipe as is)."""
+        if self.store is not None:
+            lines = self.store.meal_lines(meal)
+            if lines is not None:
+                return lines
+        return [IngredientLine.from_ingredient(ing) for ing in meal.get("ingredients", [])]
 
     # ----------------------------------------
     # Step 2: Subtract pantry from aggregated
     # ----------------------------------------
-    def compute_missing(self, aggregated: Dict[str, Any],
-                        pantry: Dict[str, Any]) -> Dict[str, Any]:
+    def compute_missing(self, aggregated: Dict[str, Quantity],
+                        pantry: Dict[str, Any]) -> Dict[str, Quantity]:
+        """{name: Quantity still needed} (utils.quantities.missing_to_json for JSON)."""
+
+        if self.matrix is not None:
+            return self.matrix.compute_missing(aggregated, pantry)
 
         missing = {}
 
-        for name, info in aggregated.items():
+        for name, q in aggregated.items():
             have = pantry.get(name, {}).get("qty_norm", 0)
-            need = max(0, info["qty_norm"] - have)
+            need = max(0, q.qty - have)
 
             if need > 0:
-                missing[name] = {
-                    "need_norm": need,
-                    "unit_norm": info["unit_norm"]
-                }
+                missing[name] = Quantity(need, q.unit)
 
         return missing
 
     # ----------------------------------------
-    # Step 3: Round missing quantities to nearest package size
+    # Step 3: Round missing quantities to package sizes
     # ----------------------------------------
-    def round_to_package(self, name: str, need_norm: float, unit_norm: str):
-        pkg_data = self.PACKAGE_SIZES.get(name)
+    def pack(self, name: str, need_norm: float, unit_norm: str):
+        """
+        Package mix covering the need with the least waste, then the fewest
+        packages (e.g. 1100 g rice → 1000 + 500, not 2 × 1000).
+        With minimize="cost": the cheapest mix, then the least waste.
+
+        Returns:
+            total, unit, [(size, n_packages), ...] — empty list when the
+            ingredient / unit has no package sizes (buy exact quantity)
+        """
+        key = (name, unit_norm, need_norm)
+        cached = self._pack_cache.get(key)
+        if cached is not None:
+            return cached
+
+        table = None
+        if self.minimize == "cost":
+            table = self.priced_tables.get((name, unit_norm))
+        if table is None:
+            table = self.package_tables.get((name, unit_norm))
 
-        if not pkg_data:
-            # No known package size → buy exact quantity
-            return need_norm, unit_norm
+        if table is None:
+            # No known package size (or unit mismatch) → buy exact quantity
+            result = (need_norm, unit_norm, [])
+        else:
+            total, packages = table.solve(need_norm)
+            result = (total, unit_norm, packages)
 
-        size_list = pkg_data.get(unit_norm)
-        if not size_list:
-            # Unit mismatch → still return exact
-            return need_norm, unit_norm
+        if len(self._pack_cache) >= self.PACK_CACHE_SIZE:
+            self._pack_cache.clear()
+        self._pack_cache[key] = result
+        return result
 
-        size_list = sorted(size_list)
+    def round_to_package(self, name: str, need_norm: float, unit_norm: str):
+        total, unit, _ = self.pack(name, need_norm, unit_norm)
+        return total, unit
 
-        # First package that fits the need
-        for size in size_list:
-            if size >= need_norm:
-                return size, unit_norm
+    def item_cost(self, name: str, qty: float, unit_norm: str, packages=()):
+        """Price of buying qty of an ingredient, or None if it has no price."""
+        table = self.priced_tables.get((name, unit_norm))
+        if table is not None and packages:
+            return table.cost(packages)
 
-        # If need larger than all packages → pick multiples of the largest
-        largest = size_list[-1]
-        multiplier = (need_norm + largest - 1) // largest
-        return int(multiplier * largest), unit_norm
+        unit_price = self.unit_prices.get(name, {}).get(unit_norm)
+        if unit_price is None:
+            return None
+        return qty * unit_price
 
     # ----------------------------------------
     # Step 4: Construct final shopping list
     # ----------------------------------------
-    def build_shopping_list(self, missing: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def build_shopping_list(self, missing: Dict[str, Quantity]) -> List[Dict[str, Any]]:
         shopping = []
+        priced = self.minimize == "cost"
 
-        for name, info in missing.items():
-            qty, unit = self.round_to_package(
+        for name, q in missing.items():
+            qty, unit, packages = self.pack(
                 name,
-                info["need_norm"],
-                info["unit_norm"]
+                q.qty,
+                q.unit_norm
             )
 
-            shopping.append({
+            item = {
                 "ingredient": name,
                 "qty": qty,
                 "unit": unit
-            })
+            }
+            if priced:
+                cost = self.item_cost(name, qty, unit, packages)
+                item["cost"] = None if cost is None else round(cost, 2)
+
+            shopping.append(item)
 
         return shopping
+
+    # ----------------------------------------
+    # Step 5: Budget check
+    # ----------------------------------------
+    def budget_report(self, plan: Dict[str, Any], shopping_list: List[Dict[str, Any]],
+                      budget: float) -> Dict[str, Any]:
+        """
+        Prices the shopping list and, when it is over budget, suggests which
+        meals to swap: each item's cost is shared among the meals using the
+        ingredient (in proportion to their need), and the most expensive
+        meals are listed until the remaining cost fits the budget.
+
+        Returns:
+            {"total_cost", "budget", "within_budget", "unpriced": [...],
+             "swap_meals": [{"day", "recipe_id", "title", "cost"}, ...]}
+        """
+        costs = {}
+        unpriced = []
+        for item in shopping_list:
+            name = item["ingredient"]
+            cost = item.get("cost")
+            if cost is None:
+                _, _, packages = self.pack(name, item["qty"], item["unit"])
+                cost = self.item_cost(name, item["qty"], item["unit"], packages)
+            if cost is None:
+                unpriced.append(name)
+            else:
+                costs[name] = cost
+
+        total_cost = sum(costs.values())
+        report = {
+            "total_cost": round(total_cost, 2),
+            "budget": budget,
+            "within_budget": budget is None or total_cost <= budget,
+            "unpriced": unpriced,
+            "swap_meals": []
+        }
+        if report["within_budget"] or not costs:
+            return report
+
+        # need per (meal, ingredient) for the priced ingredients
+        meals = []
+        totals = {}
+        for day in plan.get("plan", []):
+            for meal in day.get("meals", []):
+                needs = {}
+                for line in self._meal_lines(meal):
+                    name = line.name
+                    if name in costs:
+                        needs[name] = needs.get(name, 0) + line.qty_norm
+                        totals[name] = totals.get(name, 0) + line.qty_norm
+                meals.append((day.get("day"), meal, needs))
+
+        shares = []
+        for day_name, meal, needs in meals:
+            share = sum(costs[n] * q / totals[n] for n, q in needs.items() if totals[n] > 0)
+            shares.append((share, day_name, meal))
+        shares.sort(key=lambda x: x[0], reverse=True)
+
+        remaining = total_cost
+        for share, day_name, meal in shares:
+            if remaining <= budget or share <= 0:
+                break
+            remaining -= share
+            report["swap_meals"].append({
+                "day": day_name,
+                "recipe_id": meal.get("recipe_id"),
+                "title": meal.get("title"),
+                "cost": round(share, 2)
+            })
+
+        return report
+
+    # ----------------------------------------
+    # Async variants (run the step on a worker thread; asyncio is
+    # imported on first call, it is loaded anyway once a coroutine runs)
+    # ----------------------------------------
+    async def aggregate_ingredients_async(self, plan: Dict[str, Any],
+                                          provenance: bool = False) -> Dict[str, Quantity]:
+        import asyncio
+        return await asyncio.to_thread(self.aggregate_ingredients, plan, provenance)
+
+    async def compute_missing_async(self, aggregated: Dict[str, Quantity],
+                                    pantry: Dict[str, Any]) -> Dict[str, Quantity]:
+        import asyncio
+        return await asyncio.to_thread(self.compute_missing, aggregated, pantry)
+
+    async def build_shopping_list_async(self, missing: Dict[str, Quantity]) -> List[Dict[str, Any]]:
+        import asyncio
+        return await asyncio.to_thread(self.build_shopping_list, missing)
@@ -2,26 +2,93 @@
 Meal Planner Agent
 
 Responsibilities:
-- Generate a 7-day meal plan using RECIPES_SAMPLE (from data.py)
+- Generate a meal plan over a configurable horizon (default 7 days)
+  using RECIPES_SAMPLE (from data.py)
+- Extend an existing plan by new days (rolling horizon) without re-planning
+- Compile the recipes once into a RecipeCatalog (utils/catalog.py)
 - Respect dietary_constraints
-- Avoid forbidden ingredients
+- Avoid forbidden ingredients and allergens (compiled exclusion mask,
+  utils/exclusion.py)
+- Optionally pick recipes by pantry coverage (greedy or beam search)
+- Optionally enforce the profile's variety goals (ingredient bitsets)
+- Async variant (generate_plan_async) for callers inside an event loop
 - Output plan structure exactly as required by orchestrator
 """
 
+import heapq
+from collections import deque
 from typing import Dict, Any, List
 from copy import deepcopy
-from utils.normalizer import normalize_name
+from utils.catalog import RecipeCatalog, popcount
+from utils.exclusion import exclusion_filter
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
 
 class MealPlannerAgent:
     """Simple rule-based meal planner."""
 
-    def __init__(self, recipes: List[Dict[str, Any]]):
-        self.recipes = recipes
+    SELECTIONS = ("round_robin", "greedy", "beam", "variety")
+
+    def __init__(self, recipes, selection: str = "round_robin", beam_width: int = 4,
+                 horizon_days: int = 7, repeat_window: int = 7, max_overlap: int = 1,
+                 scan_limit: int = 1024):
+        """
+        recipes: list of recipe dicts, or an already compiled RecipeCatalog
+        (lets several planners share one catalog, or streams a file-backed
+        one via utils.recipe_loader.load_catalog).
+
+        selection:
+            "round_robin" — cycle through the admissible recipes (default)
+            "greedy"      — each day, the recipe the remaining pantry covers best
+            "beam"        — beam search of width beam_width over the same score
+            "variety"     — round robin order, skipping recipes that break the
+                            profile's goals (see _select_variety)
+        The coverage modes need context["inventory"] and fall back to
+        round_robin without it.
+
+        Variety goals (user_profile["goals"]):
+            meal_variety                  — no recipe twice within repeat_window days
+            avoid_repetitive_ingredients  — consecutive days share at most
+                                            max_overlap ingredients
+        Each day scans at most scan_limit candidates; if none satisfies both
+        goals, the least-violating one is taken ("relaxed_days" in the trace).
+
+        horizon_days: days per generated plan (4–12 weeks = 28–84);
+        context["horizon_days"] overrides it per call.
+        """
+        if selection not in self.SELECTIONS:
+            raise ValueError(f"Unknown selection {selection!r}, expected one of {self.SELECTIONS}")
+        if horizon_days < 1:
+            raise ValueError(f"horizon_days must be >= 1, got {horizon_days}")
+        if repeat_window < 0 or max_overlap < 0 or scan_limit < 1:
+            raise ValueError("repeat_window and max_overlap must be >= 0, scan_limit >= 1")
+
+        self.selection = selection
+        self.horizon_days = horizon_days
+        self.beam_width = max(1, beam_width)
+        self.repeat_window = repeat_window
+        self.max_overlap = max_overlap
+        self.scan_limit = scan_limit
+
+        if isinstance(recipes, RecipeCatalog):
+            self.catalog = recipes
+        else:
+            self.catalog = RecipeCatalog(recipes)
+
+    @property
+    def recipes(self) -> List[Dict[str, Any]]:
+        return self.catalog.recipes
+
+    def horizon(self, context: Dict[str, Any]) -> int:
+        """Days generate_plan plans for this context."""
+        return context.get("horizon_days") or self.horizon_days
 
     def generate_plan(self, user_profile: Dict[str, Any], context: Dict[str, Any]):
         """
-        Generates a 7-day dinner-only meal plan.
+        Generates a dinner-only meal plan over horizon(context) days,
+        starting on context.get("start_day", "Mon") (day names repeat
+        weekly).
         Output shape:
 
         {
@@ -45,53 +112,144 @@ class MealPlannerAgent:
         }
         """
 
-        days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-
-        forbidden = set(normalize_name(x) for x in user_profile.get("forbidden", []))
-        diet = set(normalize_name(x) for x in user_profile.get("dietary_constraints", []))
-        servings = user_profile.get("servings", 2)
+        start_day = context.get("start_day", "Mon")
+        if start_day not in DAYS:
+            raise ValueError(f"Unknown start_day {start_day!r}, expected one of {DAYS}")
 
         # -------------------------------
         # 1. Filter recipes by rules
         # -------------------------------
-        candidates = []
+        candidates = self._candidates(user_profile, context)
 
-        for recipe in self.recipes:
-            category = normalize_name(recipe.get("category", ""))
+        # ------------------------------
+        # 2. Build final plan
+        # ------------------------------
+        plan = {
+            "user_id": user_profile.get("user_id"),
+            "week_start": context.get("week_start"),
+            "plan": []
+        }
 
-            # forbidden check
-            ing_names = {normalize_name(i["name"]) for i in recipe.get("ingredients", [])}
-            if ing_names & forbidden:
-                continue
+        picks, info = self._pick(candidates, self.horizon(context), user_profile, context, [])
+        plan["plan"] = self._days(picks, DAYS.index(start_day), user_profile)
 
-            # dietary constraint check
-            if diet and category not in diet:
-                # allow vegetarian ↔ veg
-                if not ("vegetarian" in diet and category == "vegetarian"):
-                    continue
+        trace = {
+            "agent": "MealPlanner",
+            "generated_days": len(plan["plan"]),
+            **info
+        }
+
+        return plan, trace
+
+    def extend_plan(self, plan: Dict[str, Any], user_profile: Dict[str, Any],
+                    context: Dict[str, Any], days: int = 1, drop: int = 0):
+        """
+        Rolls a plan forward: appends `days` new days after its last day
+        and drops the first `drop` days. Kept days are reused as they are
+        (not re-planned); the input plan is not modified.
 
-            candidates.append(recipe)
+        New days continue the selection: round_robin resumes the cycle
+        after the last planned recipe, and greedy / beam start from the
+        pantry left after the kept days (ranked against the full context
+        inventory, as for a new plan). With the same context,
+        extend_plan(generate_plan(n days), k) == generate_plan(n + k days)
+        for round_robin and greedy.
+
+        GroceryOptimizerAgent.update_aggregated(aggregated, new_days,
+        dropped_days) brings the plan's aggregated needs up to date; the
+        trace lists both day counts.
+        """
+        if days < 0 or drop < 0:
+            raise ValueError(f"days and drop must be >= 0, got {days} and {drop}")
+
+        kept = plan.get("plan", [])[drop:]
+        candidates = self._candidates(user_profile, context)
+        picks, info = self._pick(candidates, days, user_profile, context, kept)
+
+        last_day = kept[-1].get("day") if kept else None
+        if last_day in DAYS:
+            first = (DAYS.index(last_day) + 1) % len(DAYS)
+        else:
+            first = DAYS.index(context.get("start_day", "Mon"))
+        new_days = self._days(picks, first, user_profile)
+
+        extended = dict(plan, plan=kept + new_days)
+        trace = {
+            "agent": "MealPlanner",
+            "generated_days": len(new_days),
+            "dropped_days": min(drop, len(plan.get("plan", []))),
+            "horizon_days": len(extended["plan"]),
+            **info
+        }
+
+        return extended, trace
+
+    def _candidates(self, user_profile: Dict[str, Any], context: Dict[str, Any]):
+        # forbidden + allergies + diet, compiled once per distinct profile
+        candidates = exclusion_filter(self.catalog, user_profile).candidates()
 
         # fallback if filtering removed everything
         if not candidates:
             candidates = self.recipes
 
-        # ------------------------------
-        # 2. Build final 7-day plan
-        # ------------------------------
-        plan = {
-            "user_id": user_profile.get("user_id"),
-            "week_start": context.get("week_start"),
-            "plan": []
-        }
+        # context["variant"] rotates the candidate order, so variants
+        # 0, 1, 2, ... give different (but equally valid) plans
+        shift = context.get("variant", 0) % len(candidates) if candidates else 0
+        if shift:
+            candidates = candidates[shift:] + candidates[:shift]
+        return candidates
+
+    def _pick(self, candidates, n_days: int, user_profile: Dict[str, Any],
+              context: Dict[str, Any], planned):
+        """
+        (recipes for the next n_days, trace fields incl. the selection
+        used), continuing after the already planned days.
+        """
+        planned_ids = [meal["recipe_id"] for day in planned for meal in day.get("meals", [])]
+
+        if self.selection == "variety":
+            picks, relaxed = self._select_variety(candidates, n_days,
+                                                  user_profile.get("goals", {}), planned_ids)
+            return picks, {"selection": "variety", "relaxed_days": relaxed}
 
-        idx = 0
-        for day in days:
-            selected = candidates[idx % len(candidates)]
-            idx += 1
+        inventory = context.get("inventory")
+        if self.needs_inventory and inventory is not None:
+            full = {name: info.get("qty_norm", 0) for name, info in inventory.items()}
+            pantry = full
+            for rid in planned_ids:
+                if rid in self.catalog.base_needs:
+                    pantry = self._consume(rid, pantry)
+            previous = planned_ids[-1] if planned_ids else None
 
-            plan["plan"].append({
-                "day": day,
+            # Candidates are ranked against the full pantry, as for a new
+            # plan, so ties between equally covering recipes break the
+            # same way whether the days are planned at once or extended
+            if self.selection == "greedy":
+                picks = self._select_greedy(candidates, n_days, pantry, previous, full)
+                return picks, {"selection": "greedy"}
+            return self._select_beam(candidates, n_days, pantry, previous, full), {"selection": "beam"}
+
+        start = self._resume(candidates, planned_ids)
+        picks = [candidates[(start + i) % len(candidates)] for i in range(n_days)]
+        return picks, {"selection": "round_robin"}
+
+    @staticmethod
+    def _resume(candidates, planned_ids) -> int:
+        """Candidate index after the last planned recipe (0 for a new plan)."""
+        if not planned_ids:
+            return 0
+        last = planned_ids[-1]
+        for i, recipe in enumerate(candidates):
+            if recipe["recipe_id"] == last:
+                return i + 1
+        return 0
+
+    @staticmethod
+    def _days(picks, first: int, user_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+        servings = user_profile.get("servings", 2)
+        return [
+            {
+                "day": DAYS[(first + i) % len(DAYS)],
                 "meals": [
                     {
                         "type": "dinner",
@@ -101,11 +259,179 @@ class MealPlannerAgent:
                         "ingredients": deepcopy(selected["ingredients"])
                     }
                 ]
-            })
+            }
+            for i, selected in enumerate(picks)
+        ]
 
-        trace = {
-            "agent": "MealPlanner",
-            "generated_days": len(plan["plan"])
-        }
+    async def generate_plan_async(self, user_profile: Dict[str, Any], context: Dict[str, Any]):
+        """generate_plan() on a worker thread."""
+        import asyncio
+        return await asyncio.to_thread(self.generate_plan, user_profile, context)
 
-        return plan, trace
+    @property
+    def needs_inventory(self) -> bool:
+        """True if generate_plan reads context["inventory"]."""
+        return self.selection in ("greedy", "beam")
+
+    # ----------------------------------------
+    # Variety-constrained selection
+    # ----------------------------------------
+    def _select_variety(self, candidates, n_days: int, goals: Dict[str, Any], planned_ids):
+        """
+        (picks, relaxed day count). Walks the candidates in round robin
+        order and takes the first one that is not among the previous
+        repeat_window - 1 recipes and shares at most max_overlap
+        ingredients with yesterday's (popcount of the AND of the two
+        catalog bitsets). A goal the profile does not set is not checked.
+
+        A day scans at most scan_limit candidates; when none passes, the
+        scanned one with the fewest violations (repeat first, then
+        overlap) is used and the day counts as relaxed.
+        """
+        window = self.repeat_window if goals.get("meal_variety") else 0
+        check_overlap = bool(goals.get("avoid_repetitive_ingredients"))
+        max_overlap = self.max_overlap
+        catalog = self.catalog
+
+        def bits_of(rid):
+            # bitsets are only needed (and built) when overlap is checked
+            return catalog.ingredient_bits(rid) if check_overlap and rid in catalog else 0
+
+        n = len(candidates)
+        limit = min(n, self.scan_limit)
+        cursor = self._resume(candidates, planned_ids)
+
+        # recipes of the previous window - 1 days, with counts
+        recent = deque(planned_ids[-(window - 1):] if window > 1 else ())
+        blocked: Dict[str, int] = {}
+        for rid in recent:
+            blocked[rid] = blocked.get(rid, 0) + 1
+        prev_bits = bits_of(planned_ids[-1]) if planned_ids else 0
+
+        picks = []
+        relaxed = 0
+        for _ in range(n_days):
+            choice, best_key = None, None
+            for step in range(limit):
+                index = (cursor + step) % n
+                rid = candidates[index]["recipe_id"]
+                repeated = rid in blocked
+                overlap = popcount(bits_of(rid) & prev_bits) if check_overlap else 0
+
+                if not repeated and overlap <= max_overlap:
+                    choice = index
+                    break
+                key = (repeated, overlap)
+                if best_key is None or key < best_key:
+                    choice, best_key = index, key
+            else:
+                relaxed += 1
+
+            recipe = candidates[choice]
+            rid = recipe["recipe_id"]
+            picks.append(recipe)
+            cursor = choice + 1
+            prev_bits = bits_of(rid)
+
+            if window > 1:
+                recent.append(rid)
+                blocked[rid] = blocked.get(rid, 0) + 1
+                if len(recent) > window - 1:
+                    old = recent.popleft()
+                    blocked[old] -= 1
+                    if not blocked[old]:
+                        del blocked[old]
+
+        return picks, relaxed
+
+    # ----------------------------------------
+    # Pantry-coverage selection
+    # ----------------------------------------
+    def _consume(self, recipe_id: str, pantry: Dict[str, float]) -> Dict[str, float]:
+        remaining = dict(pantry)
+        for name, qty in self.catalog.base_needs[recipe_id].items():
+            if name in remaining:
+                remaining[name] = max(0, remaining[name] - qty)
+        return remaining
+
+    def _best_pick(self, candidates, table, pantry, previous):
+        """
+        Candidate with the highest coverage of the remaining pantry.
+
+        The precomputed table (coverage against the full pantry) is an upper
+        bound, since the pantry only shrinks: candidates are tried in table
+        order and the scan stops once no remaining one can beat the best.
+        Yesterday's recipe is skipped when there is another choice.
+        """
+        best, best_score = None, -1.0
+        for recipe in candidates:
+            rid = recipe["recipe_id"]
+            if table[rid] <= best_score:
+                break
+            if rid == previous and len(candidates) > 1:
+                continue
+            score = self.catalog.coverage(rid, pantry)
+            if score > best_score:
+                best, best_score = recipe, score
+        return best, best_score
+
+    def _top_picks(self, candidates, table, pantry, previous, width):
+        """
+        The `width` candidates with the highest coverage of the remaining
+        pantry, best first (ties in candidate order). Same table bound as
+        _best_pick: the scan stops once no remaining candidate can beat
+        the width-th best.
+        """
+        top = []    # min-heap of (score, -position, recipe)
+        for position, recipe in enumerate(candidates):
+            rid = recipe["recipe_id"]
+            if len(top) == width and table[rid] <= top[0][0]:
+                break
+            if rid == previous and len(candidates) > 1:
+                continue
+            entry = (self.catalog.coverage(rid, pantry), -position, recipe)
+            if len(top) < width:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+        return [(score, recipe) for score, _, recipe in sorted(top, key=lambda e: (-e[0], -e[1]))]
+
+    def _ranked(self, candidates, pantry):
+        table = self.catalog.coverage_table((r["recipe_id"] for r in candidates), pantry)
+        ranked = sorted(candidates, key=lambda r: table[r["recipe_id"]], reverse=True)
+        return ranked, table
+
+    def _select_greedy(self, candidates, n_days: int, pantry: Dict[str, float],
+                       previous=None, full=None):
+        # full: pantry to rank against (default: pantry), an upper bound of it
+        ranked, table = self._ranked(candidates, pantry if full is None else full)
+
+        picks = []
+        for _ in range(n_days):
+            recipe, _ = self._best_pick(ranked, table, pantry, previous)
+            picks.append(recipe)
+            previous = recipe["recipe_id"]
+            pantry = self._consume(previous, pantry)
+        return picks
+
+    def _select_beam(self, candidates, n_days: int, pantry: Dict[str, float],
+                     previous=None, full=None):
+        ranked, table = self._ranked(candidates, pantry if full is None else full)
+        width = self.beam_width
+
+        # beam entries: (total score, picks, remaining pantry)
+        beam = [(0.0, [], pantry)]
+        for _ in range(n_days):
+            expanded = []
+            for total, picks, remaining in beam:
+                last = picks[-1]["recipe_id"] if picks else previous
+                for score, recipe in self._top_picks(ranked, table, remaining, last, width):
+                    expanded.append((total + score, picks + [recipe], remaining, recipe))
+
+            expanded.sort(key=lambda x: x[0], reverse=True)
+            beam = [
+                (total, picks, self._consume(recipe["recipe_id"], remaining))
+                for total, picks, remaining, recipe in expanded[:width]
+            ]
+
+        return beam[0][1]
@@ -6,17 +6,20 @@ Responsibilities:
 - Normalize ingredient names
 - Convert all units to base units (g, ml, pcs)
 - Return consistent pantry dictionary for the orchestrator
+- Serve the inventory of a PantryStore (delta-updated, no rebuild)
+- Async variant (read_inventory_async) for callers inside an event loop
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from utils.conversions import convert_to_base
-from utils.normalizer import normalize_name
+from utils.normalizer import normalize_name_cached
+from utils.pantry_store import PantryStore
 
 
 class PantryCheckerAgent:
     """Reads and normalizes pantry inventory."""
 
-    def __init__(self, pantry_data: Dict[str, Any]):
+    def __init__(self, pantry_data: Union[Dict[str, Any], PantryStore]):
         self.pantry_data = pantry_data
 
     def read_inventory(self):
@@ -28,12 +31,24 @@ class PantryCheckerAgent:
             "eggs": {"qty": 4, "unit": "pcs", "qty_norm": 4, "unit_norm": "pcs"},
             ...
         }
+
+        With a PantryStore the store's current inventory is returned as is
+        (deltas already applied); treat it as read-only.
         """
 
+        if isinstance(self.pantry_data, PantryStore):
+            inventory = self.pantry_data.inventory()
+            trace = {
+                "agent": "PantryChecker",
+                "items": len(inventory),
+                "version": self.pantry_data.version
+            }
+            return inventory, trace
+
         inventory = {}
 
         for item in self.pantry_data.get("items", []):
-            name = normalize_name(item.get("name", ""))
+            name = normalize_name_cached(item.get("name", ""))
 
             qty = item.get("qty", 0)
             unit = item.get("unit", "pcs")
@@ -53,3 +68,8 @@ class PantryCheckerAgent:
         }
 
         return inventory, trace
+
+    async def read_inventory_async(self):
+        """read_inventory() on a worker thread, so slow pantry I/O does not block the event loop."""
+        import asyncio
+        return await asyncio.to_thread(self.read_inventory)
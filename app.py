@@ -1,157 +1,801 @@
 """
 app.py — Orchestrator for Smart Meal & Grocery Agent
 Responsibilities:
-- Run Meal Planner → Pantry Checker → Grocery Optimizer
+- Run Pantry Checker → Meal Planner → Grocery Optimizer
 - Call Evaluator based on 5 rules
-- Save outputs to /output/
-- Maintain traces/logs
+- Save outputs to /output/ (atomic writes, optional compact / gzip)
+- Maintain traces/logs (streamed to traces.jsonl as each loop finishes),
+  with per-stage timings (utils/spans.py)
+- Opt-in cProfile / tracemalloc reports per loop or stage (utils/profiling.py)
+- Plan many households in one run (run_batch)
+- Optionally race several candidate plans under a deadline
+- Async orchestrator (run_orchestrator_async): same loop, with the I/O
+  (inputs, pantry read, traces, outputs) on worker threads
 """
 
 import time
 import json
-import csv
 import os
+from concurrent.futures import (
+    ThreadPoolExecutor, FIRST_COMPLETED,
+    TimeoutError as FuturesTimeout, as_completed, wait
+)
 
-# Import embedded data
-from data import USER_PROFILE, PANTRY_SAMPLE, RECIPES_SAMPLE
+# Inputs (profile, pantry, recipe catalog) are loaded on first use through
+# data.get_user_profile / get_pantry / get_recipe_catalog; asyncio,
+# ProcessPoolExecutor and the profiler are imported where they are used,
+# to keep `import app` fast.
 
 # Import Agents
 from agents.meal_planner import MealPlannerAgent
 from agents.pantry_checker import PantryCheckerAgent
 from agents.grocery_optimizer import GroceryOptimizerAgent
+from utils.catalog import RecipeCatalog
+from utils.exclusion import exclusion_filter
+from utils.pantry_store import PantryStore
+from utils.stage_cache import StageCache, fingerprint
+from utils.output_writer import TraceWriter, write_csv, write_json
+from utils.spans import SpanRecorder
 
 # Import Evaluator
 from evaluator import evaluate_plan
 
-OUTPUT_DIR = "output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+OUTPUT_DIR = "output"   # created by run_orchestrator, not on import
 
 
 # -----------------------------------------------------
 # File Saving Helpers
 # -----------------------------------------------------
-def save_meal_plan(plan, filename):
-    with open(filename, "w") as f:
-        json.dump(plan, f, indent=2)
+# Writes are atomic (temp file + rename); a ".gz" filename is gzipped.
+def save_meal_plan(plan, filename, compact=False):
+    write_json(plan, filename, compact=compact)
 
 
 def save_shopping_csv(shopping_list, filename):
-    with open(filename, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["ingredient", "qty", "unit"])
-        writer.writeheader()
-        for item in shopping_list:
-            writer.writerow(item)
+    fieldnames = ["ingredient", "qty", "unit"]
+    if any("cost" in item for item in shopping_list):
+        fieldnames.append("cost")
+
+    write_csv(shopping_list, fieldnames, filename)
+
+
+def _emit(traces, record, on_trace):
+    # Stream the record when a sink is given, otherwise keep it
+    if on_trace is None:
+        traces.append(record)
+    else:
+        on_trace(record)
 
 
 # -----------------------------------------------------
 # ORCHESTRATOR LOOP
 # -----------------------------------------------------
-def run_orchestrator(max_loops=5, threshold=0.9):
+def _call(profiler, loop, stage, fn, *args):
+    # fn(*args), under the profiler (on the calling thread) if set
+    if profiler is None:
+        return fn(*args)
+    return profiler.run(loop, stage, fn, *args)
+
+
+def _pantry_key(pantry_data):
+    # A PantryStore's version (or an explicit pantry "version") avoids hashing the items
+    if isinstance(pantry_data, PantryStore):
+        return ("store", pantry_data.version)
+    if "version" in pantry_data:
+        return ("version", pantry_data["version"])
+    return fingerprint(pantry_data.get("items", []))
+
+
+def _missing_and_shopping(optimizer, aggregated, inventory):
+    missing = optimizer.compute_missing(aggregated, inventory)
+    return missing, optimizer.build_shopping_list(missing)
+
+
+def _budget_report(optimizer, plan, shopping_list, user_profile):
+    # None when the profile has no budget
+    budget = user_profile.get("budget")
+    if budget is None:
+        return None
+    return optimizer.budget_report(plan, shopping_list, budget)
+
+
+def _meal_count(plan):
+    return sum(len(day.get("meals", [])) for day in plan.get("plan", []))
+
+
+def _with_timing(trace, spans, stage, **counts):
+    # Copy (stage outputs may be reused from the cache) plus the stage timing
+    ms = spans.ms(stage)
+    if ms is None:
+        return trace
+    return dict(trace, duration_ms=round(ms, 3), **counts)
+
+
+class _UserLoop:
+    """
+    State and stages of one user's pantry → plan → optimize → evaluate
+    loop, driven by plan_for_user (plain calls) and plan_for_user_async
+    (pantry read on a worker thread).
+
+    Each stage is keyed by its inputs (pantry hash/version, plan hash);
+    when they match the previous loop the stage is skipped and its output
+    reused. Per-stage hit/run counts go to traces[i]["stage_cache"].
+    """
+
+    def __init__(self, user_profile, pantry_data, planner, optimizer, context,
+                 threshold, verbose, timing, profiler):
+        self.user_profile = user_profile
+        self.pantry_data = pantry_data
+        self.planner = planner
+        self.optimizer = optimizer
+        self.context = context
+        self.threshold = threshold
+        self.verbose = verbose
+        self.profiler = profiler
+
+        self.pantry_agent = PantryCheckerAgent(pantry_data)
+
+        # Stages whose inputs did not change since the previous loop are skipped
+        self.cache = StageCache()
+        self.profile_key = fingerprint(user_profile)
+        self.context_key = fingerprint(context)
+        self.pantry_key = None
+
+        # Forbidden / allergies / diet compiled once per distinct profile
+        # (cached on the catalog), shared with the planner and the evaluator
+        self.exclusion = exclusion_filter(planner.catalog, user_profile)
+
+        self.spans = SpanRecorder(enabled=timing)
+
+        self.loop_count = 0
+        self.loop_start = 0.0
+        self.best_result = None
+
+    def begin(self):
+        self.loop_count += 1
+        self.loop_start = time.time()
+        self.spans.reset()
+        self.pantry_key = _pantry_key(self.pantry_data)
+        if self.profiler is not None:
+            self.profiler.start_loop(self.loop_count)
+
+        if self.verbose:
+            print(f"\n[Orchestrator] Loop {self.loop_count} starting...")
+
+    # ----------------------------
+    # 1) Read/normalize pantry
+    # ----------------------------
+    def read_pantry(self):
+        with self.spans.span("pantry"):
+            return self.cache.run(
+                "pantry", self.pantry_key,
+                lambda: _call(self.profiler, self.loop_count, "pantry",
+                              self.pantry_agent.read_inventory)
+            )
+
+    # ----------------------------
+    # 2) Generate the plan (coverage-aware modes read the inventory)
+    # ----------------------------
+    def plan(self, inventory):
+        planner = self.planner
+        key = (self.profile_key, self.context_key)
+        if planner.needs_inventory:
+            key += (self.pantry_key,)
+        else:
+            inventory = None
+
+        def generate():
+            plan, trace = _call(self.profiler, self.loop_count, "planner", planner.generate_plan,
+                                self.user_profile, dict(self.context, inventory=inventory))
+            return plan, trace, fingerprint(plan)
+
+        with self.spans.span("planner"):
+            return self.cache.run("planner", key, generate)
+
+    # ----------------------------
+    # 3) Aggregate, missing, shopping list, budget
+    # 4) Evaluate the plan
+    # ----------------------------
+    def finish(self, inventory, trace_pantry, planned):
+        """Remaining stages; returns (trace record, threshold met)."""
+        profiler, loop_count = self.profiler, self.loop_count
+        optimizer, spans, cache = self.optimizer, self.spans, self.cache
+        plan, trace_planner, plan_key = planned
+        spans.count("pantry", len(inventory))
+        spans.count("planner", _meal_count(plan))
+
+        with spans.span("aggregate"):
+            aggregated = cache.run(
+                "aggregate", plan_key,
+                lambda: _call(profiler, loop_count, "aggregate",
+                              optimizer.aggregate_ingredients, plan)
+            )
+        spans.count("aggregate", len(aggregated))
+
+        with spans.span("shopping"):
+            missing, shopping_list = cache.run(
+                "shopping", (plan_key, self.pantry_key),
+                lambda: _call(profiler, loop_count, "shopping",
+                              _missing_and_shopping, optimizer, aggregated, inventory)
+            )
+        spans.count("shopping", len(shopping_list))
+
+        with spans.span("budget"):
+            budget = cache.run(
+                "budget", (plan_key, self.pantry_key),
+                lambda: _call(profiler, loop_count, "budget", _budget_report,
+                              optimizer, plan, shopping_list, self.user_profile)
+            )
+
+        loop_runtime = time.time() - self.loop_start
+
+        with spans.span("evaluate"):
+            eval_result = _call(
+                profiler, loop_count, "evaluate", lambda: evaluate_plan(
+                    plan=plan,
+                    shopping_list=shopping_list,
+                    inventory=inventory,
+                    user_profile=self.user_profile,
+                    loop_count=loop_count,
+                    runtime=loop_runtime,
+                    store=self.planner.catalog,
+                    aggregated=aggregated,
+                    missing=missing,
+                    exclusion=self.exclusion,
+                    expected_days=self.planner.horizon(self.context)
+                )
+            )
+        spans.count("evaluate", 1)
+
+        if profiler is not None:
+            profiler.end_loop(loop_count)
+
+        if self.verbose:
+            print(
+                f"[Orchestrator] Score: {eval_result['score']:.3f}, "
+                f"Completeness: {eval_result['completeness']:.3f}, "
+                f"Forbidden: {eval_result['forbidden_found']}, "
+                f"Runtime: {loop_runtime:.2f}s"
+            )
 
-    context = {"week_start": time.strftime("%Y-%m-%d")}
-    planner = MealPlannerAgent(RECIPES_SAMPLE)
-    pantry_agent = PantryCheckerAgent(PANTRY_SAMPLE)
-    optimizer = GroceryOptimizerAgent()
+        # Track the best result
+        if self.best_result is None or eval_result["score"] > self.best_result["eval"]["score"]:
+            self.best_result = {
+                "plan": plan,
+                "shopping": shopping_list,
+                "budget": budget,
+                "eval": eval_result,
+                "loop": loop_count
+            }
 
-    loop_count = 0
+        record = {
+            "loop": loop_count,
+            "planner_trace": _with_timing(trace_planner, spans, "planner",
+                                          meals=_meal_count(plan)),
+            "pantry_trace": _with_timing(trace_pantry, spans, "pantry"),
+            "aggregated_count": len(aggregated),
+            "missing_count": len(missing),
+            "shopping_count": len(shopping_list),
+            "eval": eval_result,
+            "runtime": loop_runtime,
+            "budget": budget,
+            "stage_cache": cache.snapshot(),
+            "stages": spans.snapshot()
+        }
+
+        done = eval_result["score"] >= self.threshold
+        if not done and self.verbose:
+            print("[Orchestrator] Below threshold — retrying...\n")
+        return record, done
+
+
+def plan_for_user(user_profile, pantry_data, planner, optimizer,
+                  context, max_loops=5, threshold=0.9, verbose=True, on_trace=None,
+                  timing=True, profiler=None):
+    """
+    Runs the pantry → plan → optimize → evaluate loop for one user.
+    Nothing is written to disk here. Plain synchronous loop; see
+    plan_for_user_async for use inside an event loop.
+
+    pantry_data: PANTRY_SAMPLE-shaped dict, or a utils.pantry_store.PantryStore
+    (inventory served without a rebuild, pantry stage keyed on its version).
+
+    on_trace: optional callable given each loop's trace record as soon as
+    the loop finishes (e.g. TraceWriter.write); records are then not kept
+    and the returned traces list is empty.
+
+    timing: record per-stage durations (perf_counter_ns) and item counts
+    in traces[i]["stages"] and the planner / pantry traces.
+
+    profiler: optional utils.profiling.StageProfiler; every stage runs
+    under it (cProfile + tracemalloc reports per loop or per stage).
+
+    Each stage is skipped when its inputs (pantry hash/version, plan hash)
+    match the previous loop; hit/run counts go to traces[i]["stage_cache"].
+
+    Returns:
+        status ("success" / "max_loops"), loop count, best result, traces
+    """
+    state = _UserLoop(user_profile, pantry_data, planner, optimizer, context,
+                      threshold, verbose, timing, profiler)
     traces = []
-    best_result = None
 
-    while loop_count < max_loops:
-        loop_count += 1
-        loop_start = time.time()
+    while state.loop_count < max_loops:
+        state.begin()
+        inventory, trace_pantry = state.read_pantry()
+        planned = state.plan(inventory)
+
+        record, done = state.finish(inventory, trace_pantry, planned)
+        _emit(traces, record, on_trace)
+        if done:
+            return "success", state.loop_count, state.best_result, traces
+
+    return "max_loops", state.loop_count, state.best_result, traces
+
+
+async def plan_for_user_async(user_profile, pantry_data, planner, optimizer,
+                              context, max_loops=5, threshold=0.9, verbose=True,
+                              on_trace=None, timing=True, profiler=None):
+    """
+    plan_for_user for use inside an event loop; same arguments and result.
+
+    Only the stages that do I/O leave the event loop: the pantry read and
+    on_trace run on worker threads. When the planner does not read the
+    inventory (round_robin), planning runs while the pantry is read.
+    The CPU-bound stages run inline, as in plan_for_user.
+    """
+    state = _UserLoop(user_profile, pantry_data, planner, optimizer, context,
+                      threshold, verbose, timing, profiler)
+    import asyncio
+    loop = asyncio.get_running_loop()
+    traces = []
 
-        print(f"\n[Orchestrator] Loop {loop_count} starting...")
+    while state.loop_count < max_loops:
+        state.begin()
+        reading = loop.run_in_executor(None, state.read_pantry)
 
-        # ----------------------------
-        # 1) Generate 7-day plan
-        # ----------------------------
-        plan, trace_planner = planner.generate_plan(USER_PROFILE, context)
+        if planner.needs_inventory:
+            inventory, trace_pantry = await reading
+            planned = state.plan(inventory)
+        else:
+            planned = state.plan(None)
+            inventory, trace_pantry = await reading
 
-        # ----------------------------
-        # 2) Read/normalize pantry
-        # ----------------------------
-        inventory, trace_pantry = pantry_agent.read_inventory()
+        record, done = state.finish(inventory, trace_pantry, planned)
+        if on_trace is None:
+            traces.append(record)
+        else:
+            await asyncio.to_thread(on_trace, record)
+        if done:
+            return "success", state.loop_count, state.best_result, traces
 
-        # ----------------------------
-        # 3) Compute aggregated + missing
-        # ----------------------------
-        aggregated = optimizer.aggregate_ingredients(plan)
-        missing = optimizer.compute_missing(aggregated, inventory)
-        shopping_list = optimizer.build_shopping_list(missing)
-
-        loop_runtime = time.time() - loop_start
-
-        # ----------------------------
-        # 4) Evaluate the plan
-        # ----------------------------
-        eval_result = evaluate_plan(
-            plan=plan,
-            shopping_list=shopping_list,
-            inventory=inventory,
-            user_profile=USER_PROFILE,
-            loop_count=loop_count,
-            runtime=loop_runtime
-        )
+    return "max_loops", state.loop_count, state.best_result, traces
+
+
+def roll_plan(plan, aggregated, user_profile, planner, optimizer, context, days=1, drop=0):
+    """
+    Rolls a plan forward: appends `days` days, drops the first `drop`
+    (MealPlannerAgent.extend_plan), and updates `aggregated` (the previous
+    plan's aggregate_ingredients) with only the days that changed.
+
+    Returns:
+        new plan, new aggregated, planner trace
+    """
+    extended, trace = planner.extend_plan(plan, user_profile, context, days=days, drop=drop)
+    new_days = extended["plan"][len(extended["plan"]) - trace["generated_days"]:]
+    dropped_days = plan.get("plan", [])[:trace["dropped_days"]]
+    return extended, optimizer.update_aggregated(aggregated, new_days, dropped_days), trace
+
+
+# Planner and optimizer of a candidate worker process (pool="process"),
+# shipped once per process by _init_candidate_worker
+_CANDIDATE_AGENTS = None
+
+
+def _init_candidate_worker(planner, optimizer):
+    global _CANDIDATE_AGENTS
+    _CANDIDATE_AGENTS = (planner, optimizer)
 
-        print(
-            f"[Orchestrator] Score: {eval_result['score']:.3f}, "
-            f"Completeness: {eval_result['completeness']:.3f}, "
-            f"Forbidden: {eval_result['forbidden_found']}, "
-            f"Runtime: {loop_runtime:.2f}s"
+
+def _build_candidate_in_worker(user_profile, context, inventory, variant, timing=True):
+    planner, optimizer = _CANDIDATE_AGENTS
+    return _build_candidate(planner, optimizer, user_profile, context, inventory, variant,
+                            timing)
+
+
+def _build_candidate(planner, optimizer, user_profile, context, inventory, variant,
+                     timing=True):
+    start = time.time()
+    spans = SpanRecorder(enabled=timing)
+
+    with spans.span("planner"):
+        plan, trace_planner = planner.generate_plan(
+            user_profile, dict(context, inventory=inventory, variant=variant)
         )
+    spans.count("planner", _meal_count(plan))
+    trace_planner = _with_timing(trace_planner, spans, "planner", meals=_meal_count(plan))
 
-        # ----------------------------
-        # Store trace for logging
-        # ----------------------------
-        traces.append({
-            "loop": loop_count,
-            "planner_trace": trace_planner,
-            "pantry_trace": trace_pantry,
-            "aggregated_count": len(aggregated),
-            "missing_count": len(missing),
-            "shopping_count": len(shopping_list),
-            "eval": eval_result,
-            "runtime": loop_runtime
-        })
+    with spans.span("aggregate"):
+        aggregated = optimizer.aggregate_ingredients(plan)
+    spans.count("aggregate", len(aggregated))
+
+    with spans.span("shopping"):
+        missing, shopping_list = _missing_and_shopping(optimizer, aggregated, inventory)
+    spans.count("shopping", len(shopping_list))
+
+    return (plan, trace_planner, aggregated, missing, shopping_list,
+            time.time() - start, spans)
+
+
+def plan_for_user_parallel(user_profile, pantry_data, planner, optimizer, context,
+                           candidates=4, threshold=0.9, deadline=None,
+                           pool="thread", verbose=True, on_trace=None, timing=True,
+                           profiler=None):
+    """
+    Builds `candidates` diverse plans concurrently (planner variants
+    0..candidates-1) and evaluates each one as it completes.
+
+    Stops as soon as a plan reaches `threshold` or `deadline` seconds have
+    passed, cancels outstanding candidates and returns the best plan seen.
+    pool: "thread" or "process".
+
+    on_trace, timing: as in plan_for_user (one trace per evaluated candidate).
+    profiler: as in plan_for_user, with candidate i reported as loop i + 1;
+    with pool="process" only the evaluation (in this process) is profiled.
+
+    Returns the same tuple as plan_for_user; status is "success",
+    "deadline" (time ran out) or "max_loops" (all candidates below threshold).
+    No new work starts once the deadline has passed: when no candidate
+    finished in time, status is "deadline" and the best result is None.
+    """
+    if pool not in ("thread", "process"):
+        raise ValueError(f"pool must be 'thread' or 'process', got {pool!r}")
+
+    start = time.time()
+    pantry_spans = SpanRecorder(enabled=timing)
+    pantry_agent = PantryCheckerAgent(pantry_data)
+    with pantry_spans.span("pantry"):
+        inventory, trace_pantry = pantry_agent.read_inventory()
+    pantry_spans.count("pantry", len(inventory))
+    trace_pantry = _with_timing(trace_pantry, pantry_spans, "pantry")
+    exclusion = exclusion_filter(planner.catalog, user_profile)
+
+    if pool == "thread":
+        executor = ThreadPoolExecutor(max_workers=candidates)
+    else:
+        # The catalog travels once per worker process, not once per candidate
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=candidates,
+                                       initializer=_init_candidate_worker,
+                                       initargs=(planner, optimizer))
+    futures = {}
+    for variant in range(candidates):
+        if profiler is not None:
+            profiler.start_loop(variant + 1)
+        if pool == "process":
+            args = (_build_candidate_in_worker, user_profile, context, inventory, variant, timing)
+        else:
+            args = (_build_candidate, planner, optimizer, user_profile, context, inventory,
+                    variant, timing)
+            if profiler is not None:
+                args = (profiler.run, variant + 1, "candidate") + args
+        futures[executor.submit(*args)] = variant
 
-        # Track the best result
-        if best_result is None or eval_result["score"] > best_result["eval"]["score"]:
-            best_result = {
-                "plan": plan,
-                "shopping": shopping_list,
+    traces = []
+    evaluated = 0
+    best_result = None
+    status = "max_loops"
+    timeout = None if deadline is None else max(0.0, deadline - (time.time() - start))
+
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            variant = futures[future]
+            (plan, trace_planner, aggregated, missing, shopping_list,
+             runtime, spans) = future.result()
+
+            # Candidates run side by side: each one counts as a single loop
+            with spans.span("evaluate"):
+                eval_result = _call(
+                    profiler, variant + 1, "evaluate", lambda: evaluate_plan(
+                        plan=plan,
+                        shopping_list=shopping_list,
+                        inventory=inventory,
+                        user_profile=user_profile,
+                        loop_count=1,
+                        runtime=runtime,
+                        store=planner.catalog,
+                        aggregated=aggregated,
+                        missing=missing,
+                        exclusion=exclusion,
+                        expected_days=planner.horizon(context)
+                    )
+                )
+            spans.count("evaluate", 1)
+
+            with spans.span("budget"):
+                budget = _call(profiler, variant + 1, "budget",
+                               _budget_report, optimizer, plan, shopping_list, user_profile)
+            evaluated += 1
+
+            if profiler is not None:
+                profiler.end_loop(variant + 1)
+
+            if verbose:
+                print(f"[Orchestrator] Candidate {variant} score: {eval_result['score']:.3f}")
+
+            _emit(traces, {
+                "loop": evaluated,
+                "candidate": variant,
+                "planner_trace": trace_planner,
+                "pantry_trace": trace_pantry,
+                "aggregated_count": len(aggregated),
+                "missing_count": len(missing),
+                "shopping_count": len(shopping_list),
                 "eval": eval_result,
-                "loop": loop_count
-            }
+                "runtime": runtime,
+                "budget": budget,
+                "stages": dict(pantry_spans.snapshot(), **spans.snapshot())
+            }, on_trace)
+
+            if best_result is None or eval_result["score"] > best_result["eval"]["score"]:
+                best_result = {
+                    "plan": plan,
+                    "shopping": shopping_list,
+                    "budget": budget,
+                    "eval": eval_result,
+                    "loop": evaluated
+                }
+
+            if eval_result["score"] >= threshold:
+                status = "success"
+                break
+    except FuturesTimeout:
+        status = "deadline"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if best_result is None and verbose:
+        print("[Orchestrator] Deadline reached before any candidate finished.")
+
+    return status, evaluated, best_result, traces
+
+
+def run_orchestrator(max_loops=5, threshold=0.9, selection="round_robin",
+                     candidates=1, deadline=None, pool="thread", minimize="waste",
+                     compact=False, compress=False, timing=True, profile=None,
+                     horizon_days=7):
+    """
+    candidates > 1 switches to plan_for_user_parallel: that many diverse
+    plans are built concurrently on a `pool` ("thread"/"process") and the
+    best one is kept once `threshold` is met or `deadline` seconds pass
+    (if none is ready by then, nothing is saved and "eval" is None).
+
+    minimize="cost" buys the cheapest package mixes. When the profile has a
+    budget, the result carries a budget report (cost, meals to swap).
+
+    horizon_days sets the plan length (default one week).
+
+    Each loop's trace is appended to output/traces.jsonl as it finishes.
+    compact=True writes meal_plan.json without indentation; compress=True
+    gzips every output (".gz" suffix). timing=False drops the per-stage
+    timings from the traces.
+
+    profile="loop" / "stage" (or env MEAL_AGENT_PROFILE=loop|stage when
+    profile is None) writes cProfile .pstats files and top-N allocation
+    reports (MEAL_AGENT_PROFILE_TOP, default 20) to output/, one per loop
+    or per loop and stage.
+
+    run_orchestrator_async is the same run for use inside an event loop.
+    """
+    user_profile, pantry_data, planner, optimizer, context, profiler = _start_run(
+        selection, minimize, horizon_days, profile
+    )
+    suffix = ".gz" if compress else ""
+
+    try:
+        with TraceWriter(os.path.join(OUTPUT_DIR, "traces.jsonl" + suffix)) as trace_sink:
+            if candidates > 1:
+                outcome = plan_for_user_parallel(
+                    user_profile, pantry_data, planner, optimizer, context,
+                    candidates=candidates, threshold=threshold, deadline=deadline, pool=pool,
+                    on_trace=trace_sink.write, timing=timing, profiler=profiler
+                )
+            else:
+                outcome = plan_for_user(
+                    user_profile, pantry_data, planner, optimizer, context,
+                    max_loops=max_loops, threshold=threshold, on_trace=trace_sink.write,
+                    timing=timing, profiler=profiler
+                )
+    finally:
+        if profiler is not None:
+            profiler.close()
+
+    return _finish_run(outcome, profiler, suffix, compact)
+
+
+async def run_orchestrator_async(max_loops=5, threshold=0.9, selection="round_robin",
+                                 candidates=1, deadline=None, pool="thread",
+                                 minimize="waste", compact=False, compress=False,
+                                 timing=True, profile=None, horizon_days=7):
+    """
+    Async orchestrator; same arguments and result as run_orchestrator.
+    Loading the inputs, writing traces and saving the outputs run on
+    worker threads; planning uses plan_for_user_async.
+    """
+    import asyncio
+    user_profile, pantry_data, planner, optimizer, context, profiler = await asyncio.to_thread(
+        _start_run, selection, minimize, horizon_days, profile
+    )
+    suffix = ".gz" if compress else ""
+
+    try:
+        with TraceWriter(os.path.join(OUTPUT_DIR, "traces.jsonl" + suffix)) as trace_sink:
+            if candidates > 1:
+                # waits on its own pool: keep it off the event loop
+                outcome = await asyncio.to_thread(
+                    plan_for_user_parallel,
+                    user_profile, pantry_data, planner, optimizer, context,
+                    candidates=candidates, threshold=threshold, deadline=deadline, pool=pool,
+                    on_trace=trace_sink.write, timing=timing, profiler=profiler
+                )
+            else:
+                outcome = await plan_for_user_async(
+                    user_profile, pantry_data, planner, optimizer, context,
+                    max_loops=max_loops, threshold=threshold, on_trace=trace_sink.write,
+                    timing=timing, profiler=profiler
+                )
+    finally:
+        if profiler is not None:
+            profiler.close()
+
+    return await asyncio.to_thread(_finish_run, outcome, profiler, suffix, compact)
+
+
+def _start_run(selection, minimize, horizon_days, profile):
+    # Inputs, agents and profiler of one orchestrator run (loads the data)
+    context = {"week_start": time.strftime("%Y-%m-%d")}
+    from data import get_pantry, get_recipe_catalog, get_user_profile
+    from utils.profiling import StageProfiler, profiler_from_env
+
+    user_profile, pantry_data = get_user_profile(), get_pantry()
+    planner = MealPlannerAgent(get_recipe_catalog(), selection=selection,
+                               horizon_days=horizon_days)
+    optimizer = GroceryOptimizerAgent(recipes=planner.catalog, minimize=minimize)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-        # ----------------------------
-        # Stop if threshold met
-        # ----------------------------
-        if eval_result["score"] >= threshold:
-            print("[Orchestrator] Threshold reached. Saving output...")
+    if profile is None:
+        profiler = profiler_from_env(OUTPUT_DIR)
+    else:
+        profiler = StageProfiler(profile, output_dir=OUTPUT_DIR)
 
-            save_meal_plan(plan, os.path.join(OUTPUT_DIR, "meal_plan.json"))
-            save_shopping_csv(shopping_list, os.path.join(OUTPUT_DIR, "shopping_list.csv"))
+    return user_profile, pantry_data, planner, optimizer, context, profiler
 
-            with open(os.path.join(OUTPUT_DIR, "traces.json"), "w") as f:
-                json.dump(traces, f, indent=2)
 
-            return {"status": "success", "loops": loop_count, "eval": eval_result}
+def _finish_run(outcome, profiler, suffix, compact):
+    # Saves the best plan and shopping list; returns the run result
+    status, loop_count, best_result, _ = outcome
 
-        print("[Orchestrator] Below threshold — retrying...\n")
+    if profiler is not None:
+        print(f"[Orchestrator] Profiling ({profiler.mode}): {len(profiler.files)} files in {OUTPUT_DIR}/")
 
-    # -----------------------------------------------------
-    # If max loops ended → Save best result
-    # -----------------------------------------------------
-    print("[Orchestrator] Max loops reached. Saving best available plan...")
+    if best_result is None:
+        # Deadline passed before any candidate plan was built
+        print("[Orchestrator] Deadline reached before any plan was built. Nothing saved.")
+        return {"status": status, "loops": loop_count, "eval": None}
 
-    save_meal_plan(best_result["plan"], os.path.join(OUTPUT_DIR, "meal_plan.json"))
-    save_shopping_csv(best_result["shopping"], os.path.join(OUTPUT_DIR, "shopping_list.csv"))
+    if status == "success":
+        print("[Orchestrator] Threshold reached. Saving output...")
+    elif status == "deadline":
+        print("[Orchestrator] Deadline reached. Saving best available plan...")
+    else:
+        # If max loops ended → Save best result
+        print("[Orchestrator] Max loops reached. Saving best available plan...")
 
-    with open(os.path.join(OUTPUT_DIR, "traces.json"), "w") as f:
-        json.dump(traces, f, indent=2)
+    save_meal_plan(best_result["plan"], os.path.join(OUTPUT_DIR, "meal_plan.json" + suffix),
+                   compact=compact)
+    save_shopping_csv(best_result["shopping"], os.path.join(OUTPUT_DIR, "shopping_list.csv" + suffix))
+
+    result = {"status": status, "loops": loop_count, "eval": best_result["eval"]}
+    if best_result.get("budget") is not None:
+        result["budget"] = best_result["budget"]
+    return result
+
+
+# -----------------------------------------------------
+# BATCH PLANNING (many households per run)
+# -----------------------------------------------------
+# Catalog shared by every task of a batch worker process.
+# Set once per process by _init_batch_worker.
+_BATCH_CATALOG = None
+
+
+def _init_batch_worker(catalog):
+    global _BATCH_CATALOG
+    _BATCH_CATALOG = catalog
+
+
+def _plan_batch_user(user_profile, pantry_data, context, max_loops, threshold,
+                     selection, minimize, horizon_days=7):
+    planner = MealPlannerAgent(_BATCH_CATALOG, selection=selection, horizon_days=horizon_days)
+    optimizer = GroceryOptimizerAgent(recipes=planner.catalog, minimize=minimize)
+
+    # Batch results carry no traces, so stage timing is off
+    status, loop_count, best_result, _ = plan_for_user(
+        user_profile, pantry_data, planner, optimizer, context,
+        max_loops=max_loops, threshold=threshold, verbose=False, timing=False
+    )
+
+    return {
+        "user_id": user_profile.get("user_id"),
+        "status": status,
+        "loops": loop_count,
+        "eval": best_result["eval"],
+        "plan": best_result["plan"],
+        "shopping": best_result["shopping"],
+        "budget": best_result.get("budget")
+    }
+
+
+def run_batch(users, workers=None, recipes=None, max_loops=5, threshold=0.9,
+              selection="round_robin", minimize="waste", results_path=None,
+              horizon_days=7):
+    """
+    Plans many households over a process pool.
+
+    Parameters:
+        users: iterable of (user_profile, pantry_data) pairs — consumed lazily
+        workers: process count (default: CPU count)
+        recipes: recipe list or RecipeCatalog (default: data.get_recipe_catalog())
+        selection: MealPlannerAgent selection mode
+        minimize: GroceryOptimizerAgent package objective ("waste" / "cost")
+        horizon_days: days per plan
+        results_path: optional JSONL file (".gz" to compress); each result
+                      is appended as it is yielded, so a crash keeps the
+                      users already planned
+
+    Yields one result dict per user, in completion order. At most
+    2 × workers users are in flight, so memory stays flat for any batch size.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if recipes is None:
+        from data import get_recipe_catalog
+        catalog = get_recipe_catalog()
+    else:
+        catalog = recipes if isinstance(recipes, RecipeCatalog) else RecipeCatalog(recipes)
+    workers = workers or os.cpu_count() or 1
+    context = {"week_start": time.strftime("%Y-%m-%d")}
 
-    return {"status": "max_loops", "loops": loop_count, "eval": best_result["eval"]}
+    sink = TraceWriter(results_path) if results_path else None
+
+    def finished(future):
+        result = future.result()
+        if sink is not None:
+            sink.write(result)
+        return result
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(catalog,)) as pool:
+            pending = set()
+
+            for user_profile, pantry_data in users:
+                pending.add(pool.submit(_plan_batch_user, user_profile, pantry_data,
+                                        context, max_loops, threshold, selection, minimize,
+                                        horizon_days))
+
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield finished(future)
+
+            for future in as_completed(pending):
+                yield finished(future)
+    finally:
+        if sink is not None:
+            sink.close()
 
 
 # -----------------------------------------------------
@@ -0,0 +1,12 @@
+"""
+Benchmark suite for Smart Meal & Grocery Agent
+
+This package provides:
+- generators: seeded synthetic catalogs, pantries, profiles and plans
+  (10² – 10⁶ items)
+- runner: times every agent stage and the full orchestrator loop,
+  records throughput and peak memory to a JSON baseline, and compares
+  a run against a saved baseline
+
+Run with:  python -m benchmarks --help
+"""
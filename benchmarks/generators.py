@@ -0,0 +1,138 @@
+"""
+Synthetic Data Generators
+
+This module provides:
+- make_vocabulary: ingredient names with a fixed unit family each
+- make_catalog: recipe dicts in the RECIPES_SAMPLE shape
+- make_pantry: pantry dict in the PANTRY_SAMPLE shape
+- make_profile: user profile in the USER_PROFILE shape
+- make_plan: planner-shaped plan with any number of meals
+Used by benchmarks.runner.
+
+Every generator takes a seed and is deterministic for a given
+(size, seed), so runs on different machines time the same data.
+"""
+
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+_BASE_NAMES = [
+    "onion", "spinach", "rice", "milk", "egg", "tomato", "potato", "carrot",
+    "paneer", "cheese", "pasta", "oat", "yogurt", "banana", "mushroom",
+    "lentil", "pepper", "garlic", "ginger", "flour", "butter", "bean",
+]
+
+# unit family -> (raw spellings, typical base-unit quantity range)
+_UNIT_FAMILIES = {
+    "weight": (["g", "grams", "kg"], (20, 400)),
+    "volume": (["ml", "l", "liter"], (20, 500)),
+    "pieces": (["pcs", "piece"], (1, 4)),
+}
+
+CATEGORIES = ["vegetarian", "vegan", "non-vegetarian"]
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def make_vocabulary(n_ingredients: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """n_ingredients (name, unit family) pairs; names survive normalization unchanged."""
+    rng = random.Random(seed)
+    families = list(_UNIT_FAMILIES)
+    vocabulary = []
+    for i in range(n_ingredients):
+        base = _BASE_NAMES[i % len(_BASE_NAMES)]
+        name = base if i < len(_BASE_NAMES) else f"{base} {i}"
+        vocabulary.append((name, rng.choice(families)))
+    return vocabulary
+
+
+def _raw_quantity(rng: random.Random, family: str) -> Tuple[float, str]:
+    spellings, (low, high) = _UNIT_FAMILIES[family]
+    unit = rng.choice(spellings)
+    qty = rng.randint(low, high)
+    if unit in ("kg", "l", "liter"):
+        return qty / 1000, unit
+    return qty, unit
+
+
+def make_catalog(n_recipes: int, n_ingredients: Optional[int] = None, seed: int = 0,
+                 min_lines: int = 2, max_lines: int = 8) -> List[Dict[str, Any]]:
+    """
+    n_recipes recipes of min_lines..max_lines ingredients drawn from a
+    vocabulary of n_ingredients (default: max(50, n_recipes // 10)).
+    """
+    if n_ingredients is None:
+        n_ingredients = max(50, n_recipes // 10)
+    vocabulary = make_vocabulary(n_ingredients, seed)
+    rng = random.Random(seed + 1)
+
+    recipes = []
+    for i in range(n_recipes):
+        lines = rng.randint(min_lines, min(max_lines, n_ingredients))
+        ingredients = []
+        for name, family in rng.sample(vocabulary, lines):
+            qty, unit = _raw_quantity(rng, family)
+            ingredients.append({"name": name, "qty": qty, "unit": unit})
+
+        recipes.append({
+            "recipe_id": f"r{i}",
+            "title": f"Synthetic Recipe {i}",
+            "ingredients": ingredients,
+            "category": rng.choice(CATEGORIES)
+        })
+    return recipes
+
+
+def make_pantry(n_items: int, n_ingredients: Optional[int] = None,
+                seed: int = 0) -> Dict[str, Any]:
+    """
+    Pantry of n_items entries over the same vocabulary as make_catalog
+    (names repeat once n_items exceeds the vocabulary).
+    """
+    if n_ingredients is None:
+        n_ingredients = max(50, n_items // 10)
+    vocabulary = make_vocabulary(n_ingredients, seed)
+    rng = random.Random(seed + 2)
+
+    items = []
+    for _ in range(n_items):
+        name, family = rng.choice(vocabulary)
+        qty, unit = _raw_quantity(rng, family)
+        items.append({"name": name, "qty": qty * rng.randint(1, 5), "unit": unit})
+    return {"items": items}
+
+
+def make_profile(seed: int = 0, n_ingredients: int = 50, n_forbidden: int = 3) -> Dict[str, Any]:
+    """User profile with a dietary constraint and a few forbidden ingredients."""
+    rng = random.Random(seed + 3)
+    vocabulary = make_vocabulary(n_ingredients, seed)
+    return {
+        "user_id": f"bench_user_{seed}",
+        "servings": rng.randint(1, 4),
+        "dietary_constraints": [rng.choice(CATEGORIES[:2])],
+        "allergies": [],
+        "forbidden": [name for name, _ in rng.sample(vocabulary, min(n_forbidden, n_ingredients))],
+        "budget": rng.randint(40, 150),
+        "goals": {
+            "meal_variety": True,
+            "avoid_repetitive_ingredients": rng.random() < 0.5
+        }
+    }
+
+
+def make_plan(recipes: List[Dict[str, Any]], n_meals: int, seed: int = 0) -> Dict[str, Any]:
+    """Plan in the MealPlannerAgent shape with n_meals meals spread over the 7 days."""
+    rng = random.Random(seed + 4)
+    plan = {"user_id": f"bench_user_{seed}", "week_start": "bench",
+            "plan": [{"day": day, "meals": []} for day in DAYS]}
+
+    for i in range(n_meals):
+        recipe = rng.choice(recipes)
+        plan["plan"][i % len(DAYS)]["meals"].append({
+            "type": "dinner",
+            "recipe_id": recipe["recipe_id"],
+            "title": recipe["title"],
+            "servings": 2,
+            "ingredients": recipe["ingredients"]
+        })
+    return plan
@@ -0,0 +1,260 @@
+"""
+Benchmark Runner
+
+This module provides:
+- run_size: time each stage on one synthetic problem size
+- run_benchmarks: all sizes → baseline dict (seconds, throughput, peak memory)
+- compare: flag stages slower / bigger than a saved baseline
+- main: command line entry point (python -m benchmarks)
+
+Stages (items = what throughput is counted in):
+    catalog       RecipeCatalog build               (recipes)
+    pantry        PantryCheckerAgent.read_inventory (pantry items)
+    planner       MealPlannerAgent.generate_plan    (catalog recipes)
+    aggregate     GroceryOptimizerAgent.aggregate   (plan meals)
+    shopping      compute_missing + shopping list   (aggregated ingredients)
+    evaluate      evaluate_plan                     (plan meals)
+    orchestrator  one app.plan_for_user loop        (users)
+
+Examples:
+    python -m benchmarks --sizes 100 1000 10000 --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.grocery_optimizer import GroceryOptimizerAgent
+from agents.meal_planner import MealPlannerAgent
+from agents.pantry_checker import PantryCheckerAgent
+from benchmarks.generators import make_catalog, make_pantry, make_plan, make_profile
+from evaluator import evaluate_plan
+from utils.catalog import RecipeCatalog
+from utils.output_writer import write_json
+
+STAGES = ("catalog", "pantry", "planner", "aggregate", "shopping", "evaluate", "orchestrator")
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+# Stages faster / smaller than this are compared as if they took this
+# long / this much, so noise on tiny stages is not reported as a regression
+MIN_COMPARED_SECONDS = 0.001
+MIN_COMPARED_KIB = 64
+
+
+def _measure(fn: Callable[[], Any], items: Callable[[Any], int],
+             repeat: int, memory: bool):
+    """Runs fn `repeat` times; returns (last result, stats dict)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    seconds = statistics.median(times)
+    count = items(result)
+    stats = {
+        "seconds": seconds,
+        "best_seconds": min(times),
+        "items": count,
+        "throughput": count / seconds if seconds > 0 else None
+    }
+
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            stats["peak_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+
+    return result, stats
+
+
+def run_size(n: int, seed: int = 0, repeat: int = 3, memory: bool = True,
+             stages=STAGES, selection: str = "round_robin") -> Dict[str, Dict[str, Any]]:
+    """Stats per stage for catalog / pantry / plan size n."""
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages {sorted(unknown)}, expected some of {STAGES}")
+
+    n_ingredients = max(50, n // 10)
+    recipes = make_catalog(n, n_ingredients, seed)
+    pantry = make_pantry(n, n_ingredients, seed)
+    profile = make_profile(seed, n_ingredients)
+    plan = make_plan(recipes, n, seed)
+
+    results = {}
+
+    def stage(name, fn, items):
+        # Later stages need the outputs of earlier ones, so every stage
+        # runs at least once; only the selected ones are reported
+        if name in stages:
+            value, results[name] = _measure(fn, items, repeat, memory)
+            return value
+        return fn()
+
+    catalog = stage("catalog", lambda: RecipeCatalog(recipes), len)
+    inventory, _ = stage("pantry", lambda: PantryCheckerAgent(pantry).read_inventory(),
+                         lambda out: len(pantry["items"]))
+
+    planner = MealPlannerAgent(catalog, selection=selection)
+    stage("planner", lambda: planner.generate_plan(profile, {"inventory": inventory}),
+          lambda out: len(catalog))
+
+    optimizer = GroceryOptimizerAgent(recipes=catalog)
+    aggregated = stage("aggregate", lambda: optimizer.aggregate_ingredients(plan),
+                       lambda out: n)
+
+    def shopping():
+        missing = optimizer.compute_missing(aggregated, inventory)
+        return missing, optimizer.build_shopping_list(missing)
+
+    missing, shopping_list = stage("shopping", shopping, lambda out: len(aggregated))
+
+    stage("evaluate",
+          lambda: evaluate_plan(plan, shopping_list, inventory, profile, 1, 0.0,
+                                store=catalog, aggregated=aggregated, missing=missing),
+          lambda out: n)
+
+    if "orchestrator" in stages:
+        # imported here: app is only needed for this stage
+        from app import plan_for_user
+
+        stage("orchestrator",
+              lambda: plan_for_user(profile, pantry, planner, optimizer, {"week_start": "bench"},
+                                    max_loops=1, verbose=False, timing=False),
+              lambda out: 1)
+
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed: int = 0, repeat: int = 3, memory: bool = True,
+                   stages=STAGES, selection: str = "round_robin",
+                   verbose: bool = True) -> Dict[str, Any]:
+    """Baseline dict: {"meta": {...}, "sizes": {str(n): {stage: stats}}}."""
+    baseline = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "selection": selection,
+            "memory": memory,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "sizes": {}
+    }
+
+    for n in sizes:
+        results = run_size(n, seed=seed, repeat=repeat, memory=memory,
+                           stages=stages, selection=selection)
+        baseline["sizes"][str(n)] = results
+        if verbose:
+            _print_size(n, results)
+
+    return baseline
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Stages of `current` more than `tolerance` (0.25 = 25 %) slower, or
+    using more peak memory, than the same size / stage in `baseline`.
+    Sizes or stages missing from either side are skipped.
+    """
+    regressions = []
+    for size, stages in current.get("sizes", {}).items():
+        base_stages = baseline.get("sizes", {}).get(size, {})
+        for name, stats in stages.items():
+            base = base_stages.get(name)
+            if base is None:
+                continue
+
+            ratio = (max(stats["seconds"], MIN_COMPARED_SECONDS)
+                     / max(base["seconds"], MIN_COMPARED_SECONDS))
+            if ratio > 1 + tolerance:
+                regressions.append({"size": size, "stage": name, "metric": "seconds",
+                                    "baseline": base["seconds"], "current": stats["seconds"],
+                                    "ratio": ratio})
+
+            if "peak_kib" in stats and "peak_kib" in base:
+                ratio = (max(stats["peak_kib"], MIN_COMPARED_KIB)
+                         / max(base["peak_kib"], MIN_COMPARED_KIB))
+                if ratio > 1 + tolerance:
+                    regressions.append({"size": size, "stage": name, "metric": "peak_kib",
+                                        "baseline": base["peak_kib"], "current": stats["peak_kib"],
+                                        "ratio": ratio})
+    return regressions
+
+
+def _print_size(n: int, results: Dict[str, Dict[str, Any]]):
+    print(f"\n[Benchmark] size {n}")
+    for name, stats in results.items():
+        throughput = stats["throughput"]
+        line = (f"  {name:<13} {stats['seconds'] * 1000:10.3f} ms   "
+                f"{throughput if throughput is not None else float('nan'):14,.0f} items/s")
+        if "peak_kib" in stats:
+            line += f"   peak {stats['peak_kib']:,} KiB"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the agents on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help=f"problem sizes, 100 to 1000000 (default {list(DEFAULT_SIZES)}, "
+                             "or the baseline's sizes with --compare)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (median kept)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--selection", default="round_robin",
+                        choices=MealPlannerAgent.SELECTIONS)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown / memory growth before flagging (default 0.25)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        import json
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    sizes = args.sizes
+    if sizes is None:
+        sizes = [int(s) for s in baseline["sizes"]] if baseline else list(DEFAULT_SIZES)
+
+    results = run_benchmarks(sizes, seed=args.seed, repeat=args.repeat,
+                             memory=not args.no_memory, stages=args.stages,
+                             selection=args.selection)
+
+    if args.save:
+        write_json(results, args.save)
+        print(f"\n[Benchmark] Baseline saved to {args.save}")
+
+    if baseline is None:
+        return 0
+
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    if not regressions:
+        print(f"\n[Benchmark] No regressions (tolerance {args.tolerance:.0%})")
+        return 0
+
+    print(f"\n[Benchmark] {len(regressions)} regression(s) (tolerance {args.tolerance:.0%}):")
+    for r in regressions:
+        print(f"  size {r['size']:>8} {r['stage']:<13} {r['metric']:<9} "
+              f"{r['baseline']:.6g} → {r['current']:.6g}  (×{r['ratio']:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+
 # 1. USER PROFILE
 
 USER_PROFILE = {
@@ -330,16 +332,74 @@ RECIPES_SAMPLE = [
 ]
 
 
-# 4. Helper
-def get_all_recipe_ids():
+# 4. Lazy accessors
+# The orchestrator reads its inputs through these, on first use, so
+# importing app does not load or compile anything.
+# Environment overrides:
+#   MEAL_AGENT_RECIPES=<recipes.jsonl | .csv [.gz]>  file-backed catalog,
+#       loaded from a precompiled snapshot after the first start
+#       (utils/catalog_snapshot.py)
+#   MEAL_AGENT_USER_PROFILE / MEAL_AGENT_PANTRY=<file.json>
+RECIPES_ENV = "MEAL_AGENT_RECIPES"
+USER_PROFILE_ENV = "MEAL_AGENT_USER_PROFILE"
+PANTRY_ENV = "MEAL_AGENT_PANTRY"
+
+_LOADED = {}
+
+
+def _load_json(path):
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_user_profile():
+    """USER_PROFILE, or the JSON file named by MEAL_AGENT_USER_PROFILE."""
+    if "profile" not in _LOADED:
+        path = os.environ.get(USER_PROFILE_ENV)
+        _LOADED["profile"] = _load_json(path) if path else USER_PROFILE
+    return _LOADED["profile"]
+
+
+def get_pantry():
+    """PANTRY_SAMPLE, or the JSON file named by MEAL_AGENT_PANTRY."""
+    if "pantry" not in _LOADED:
+        path = os.environ.get(PANTRY_ENV)
+        _LOADED["pantry"] = _load_json(path) if path else PANTRY_SAMPLE
+    return _LOADED["pantry"]
+
+
+def get_recipe_catalog():
+    """
+    Indexed RecipeCatalog over RECIPES_SAMPLE, or over the recipe file
+    named by MEAL_AGENT_RECIPES (snapshotted). Built once per process.
+    """
+    if "catalog" not in _LOADED:
+        path = os.environ.get(RECIPES_ENV)
+        if path:
+            from utils.catalog_snapshot import load_catalog_cached
+            _LOADED["catalog"] = load_catalog_cached(path)
+        else:
+            from utils.catalog import RecipeCatalog
+            _LOADED["catalog"] = RecipeCatalog(RECIPES_SAMPLE)
+    return _LOADED["catalog"]
+
+
+def get_recipe_store():
+    """Indexed store of the default recipes (see get_recipe_catalog)."""
+    return get_recipe_catalog()
+
+
+# store (get_all_recipe_ids, get_recipe): optional RecipeStore, e.g. from
+# utils.recipe_loader.load_catalog; defaults to get_recipe_catalog().
+def get_all_recipe_ids(store=None):
     """Return a list of all recipe IDs in the dataset."""
-    return [r["recipe_id"] for r in RECIPES_SAMPLE]
+    store = store if store is not None else get_recipe_store()
+    return list(store.ids())
 
 # 5. Get recipe by ID
 
-def get_recipe(recipe_id: str):
+def get_recipe(recipe_id: str, store=None):
     """Retrieve a recipe by its ID."""
-    for recipe in RECIPES_SAMPLE:
-        if recipe["recipe_id"] == recipe_id:
-            return recipe
-    return None
+    store = store if store is not None else get_recipe_store()
+    return store.get(recipe_id)
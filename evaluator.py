@@ -6,10 +6,13 @@ Implements the 5 official evaluator rules from Phase 2:
 
 1. Evaluator score ≥ 0.9
 2. Completeness ≥ 98%
-3. Forbidden ingredients = 0
+3. Forbidden ingredients = 0   (forbidden, allergens and off-diet meals,
+                                 via the profile's compiled exclusion mask)
 4. Average loops ≤ 3   (penalty if exceeded)
 5. Runtime < 10 seconds (penalty if exceeded)
 
+evaluate_plans applies the same rules to many candidate plans at once.
+
 Returned object:
 {
     "score": float,
@@ -19,7 +22,11 @@ Returned object:
 }
 """
 
-from utils.normalizer import normalize_name
+from utils.optional import load_numpy  # optional, only evaluate_plans needs it
+from utils.normalizer import normalize_name_cached, normalize_names
+from utils.ingredient_matrix import store_matrix
+from utils.catalog import RecipeCatalog
+from utils.exclusion import exclusion_filter
 from agents.grocery_optimizer import GroceryOptimizerAgent
 
 
@@ -29,18 +36,43 @@ def evaluate_plan(
     inventory,
     user_profile,
     loop_count: int,
-    runtime: float
+    runtime: float,
+    store=None,
+    aggregated=None,
+    missing=None,
+    forbidden=None,
+    expected_days=7,
+    exclusion=None
 ):
     """
     Evaluates a generated meal plan based on the 5 acceptance criteria.
 
     Parameters:
-        plan: dict — 7-day meal plan
+        plan: dict — meal plan (expected_days days long)
         shopping_list: list — optimized missing ingredients
         inventory: dict — pantry after normalization
         user_profile: dict
         loop_count: int — how many loops the orchestrator ran
         runtime: float — seconds per loop
+        store: optional RecipeStore — meals found in it with unchanged
+               ingredients reuse its pre-normalized ingredient lines
+
+    Optional, already computed by the orchestrator for this loop
+    (recomputed here only when absent):
+        aggregated: GroceryOptimizerAgent.aggregate_ingredients(plan)
+        missing: GroceryOptimizerAgent.compute_missing(aggregated, inventory)
+        forbidden: set of normalized forbidden + allergen names, for
+                   meals outside the catalog
+        exclusion: the profile's utils.exclusion.ExclusionFilter
+
+    With a RecipeCatalog store, catalog meals are checked with one mask
+    test each (forbidden ingredients, allergens, dietary constraints);
+    each excluded ingredient line and each off-diet meal counts in
+    forbidden_found. Edited catalog meals and other meals are checked
+    by name.
+
+    expected_days: planning horizon completeness is measured against
+    (MealPlannerAgent.horizon(context)).
 
     Returns:
         dict with score, completeness, forbidden_found, feedback
@@ -51,7 +83,6 @@ def evaluate_plan(
     # ------------------------------------------------------
     # 1️⃣ COMPLETENESS CHECK
     # ------------------------------------------------------
-    expected_days = 7
     actual_days = len(plan.get("plan", []))
     completeness = actual_days / expected_days if expected_days else 1.0
 
@@ -59,28 +90,40 @@ def evaluate_plan(
     score = 1.0
     if completeness < 0.98:
         score -= 0.3
-        feedback.append(f"Low completeness ({completeness:.2f}) — expected 7 days.")
+        feedback.append(f"Low completeness ({completeness:.2f}) — expected {expected_days} days.")
 
 
     # ------------------------------------------------------
     # 2️⃣ FORBIDDEN INGREDIENT CHECK
     # ------------------------------------------------------
-    forbidden_list = set(normalize_name(x) for x in user_profile.get("forbidden", []))
+    exclusion, forbidden = _exclusions(user_profile, store, exclusion, forbidden)
     forbidden_found = 0
+    off_diet = 0
 
     for day in plan.get("plan", []):
         for meal in day.get("meals", []):
+            found = exclusion.meal_violations(meal) if exclusion is not None else None
+            if found is not None:
+                forbidden_found += found[0]
+                off_diet += found[1]
+                continue
+
+            lines = store.meal_lines(meal) if store is not None else None
+            if lines is not None:
+                forbidden_found += sum(1 for line in lines if line.name in forbidden)
+                continue
+
             for ing in meal.get("ingredients", []):
-                if normalize_name(ing.get("name", "")) in forbidden_list:
+                if normalize_name_cached(ing.get("name", "")) in forbidden:
                     forbidden_found += 1
 
-    if forbidden_found > 0:
-        feedback.append(f"Forbidden ingredients detected: {forbidden_found}")
+    if forbidden_found > 0 or off_diet > 0:
+        _exclusion_feedback(feedback, forbidden_found, off_diet)
         # automatic fail
         return {
             "score": 0.0,
             "completeness": completeness,
-            "forbidden_found": forbidden_found,
+            "forbidden_found": forbidden_found + off_diet,
             "feedback": feedback
         }
 
@@ -88,9 +131,11 @@ def evaluate_plan(
     # ------------------------------------------------------
     # 3️⃣ PANTRY USAGE CHECK (>= 40% is good)
     # ------------------------------------------------------
-    optimizer = GroceryOptimizerAgent()
-    aggregated = optimizer.aggregate_ingredients(plan)
-    missing = optimizer.compute_missing(aggregated, inventory)
+    if aggregated is None or missing is None:
+        optimizer = GroceryOptimizerAgent(recipes=store)
+        if aggregated is None:
+            aggregated = optimizer.aggregate_ingredients(plan)
+        missing = optimizer.compute_missing(aggregated, inventory)
 
     total_items = len(aggregated) if aggregated else 0
     used_from_pantry = (total_items - len(missing)) if total_items else 0
@@ -127,3 +172,170 @@ def evaluate_plan(
         "forbidden_found": forbidden_found,
         "feedback": feedback
     }
+
+
+def evaluate_plans(
+    plans,
+    inventory,
+    user_profile,
+    loop_count,
+    runtime,
+    matrix=None,
+    store=None,
+    forbidden=None,
+    expected_days=7,
+    exclusion=None
+):
+    """
+    Scores K candidate plans at once with the same 5 rules as evaluate_plan.
+
+    The plans are encoded as a K × S recipe-count matrix (IngredientMatrix),
+    so completeness, forbidden hits, pantry usage and the scores for all K
+    come out of a few NumPy operations.
+
+    Parameters:
+        plans: list of plan dicts
+        inventory: dict — pantry after normalization
+        user_profile: dict
+        loop_count, runtime: scalars, or one value per plan
+        matrix: IngredientMatrix to encode with (default: the store's
+                cached matrix, utils.ingredient_matrix.store_matrix)
+        store: RecipeStore the plans' recipes come from
+        forbidden: set of normalized forbidden + allergen names (computed if absent)
+        expected_days: planning horizon, as in evaluate_plan
+        exclusion: ExclusionFilter, as in evaluate_plan
+
+    Returns:
+        list of evaluate_plan result dicts, in plan order.
+        Falls back to evaluate_plan per plan without numpy, without a
+        matrix/store, or when a plan uses a recipe outside the matrix
+        or an edited meal.
+    """
+    np = load_numpy()
+    plans = list(plans)
+    exclusion, forbidden = _exclusions(user_profile, store, exclusion, forbidden)
+
+    loops = np.broadcast_to(loop_count, (len(plans),)) if np is not None else None
+    runtimes = np.broadcast_to(runtime, (len(plans),)) if np is not None else None
+
+    encoded = None
+    if np is not None and plans:
+        if matrix is None and store is not None:
+            matrix = store_matrix(store)
+        if matrix is not None:
+            encoded = matrix.encode_plans(plans)
+
+    if encoded is None:
+        return [
+            evaluate_plan(plan, [], inventory, user_profile,
+                          _nth(loop_count, i), _nth(runtime, i),
+                          store=store, forbidden=forbidden, expected_days=expected_days,
+                          exclusion=exclusion)
+            for i, plan in enumerate(plans)
+        ]
+
+    selected, counts = encoded
+
+    # 1️⃣ completeness
+    days = np.array([len(p.get("plan", [])) for p in plans])
+    completeness = days / expected_days if expected_days else np.ones(len(plans))
+
+    # 2️⃣ forbidden / allergen lines and off-diet meals per plan
+    found = None
+    if exclusion is not None:
+        # one mask test per distinct recipe
+        found = [exclusion.violations(matrix.ids[row]) for row in selected]
+    if found is not None and None not in found:
+        forbidden_per_recipe = np.array([f[0] for f in found], dtype=np.float64)
+        off_diet_per_recipe = np.array([f[1] for f in found], dtype=np.float64)
+        off_diet = (counts @ off_diet_per_recipe).astype(np.int64)
+    else:
+        values, lengths = matrix.row_values(selected)
+        owner = np.repeat(np.arange(len(selected)), lengths)
+        is_forbidden = np.array([name in forbidden for name in matrix.names], dtype=np.float64)
+        forbidden_per_recipe = np.bincount(owner, weights=is_forbidden[matrix.indices[values]],
+                                           minlength=len(selected))
+        off_diet = np.zeros(len(plans), dtype=np.int64)
+    forbidden_found = (counts @ forbidden_per_recipe).astype(np.int64)
+
+    # 3️⃣ pantry usage: share of aggregated ingredients the pantry covers
+    columns, need = matrix.sub_totals(selected, counts)
+    _, lines = matrix.sub_totals(selected, counts, weights=np.ones_like(matrix.data))
+    present = lines > 0
+    have = matrix.encode_pantry(inventory)[columns]
+    missing = present & (need - have > 0)
+
+    total_items = present.sum(axis=1)
+    used_from_pantry = total_items - missing.sum(axis=1)
+    pantry_usage = np.divide(used_from_pantry, total_items,
+                             out=np.ones(len(plans)), where=total_items > 0)
+
+    # scores, penalties applied in the same order as evaluate_plan
+    low_completeness = completeness < 0.98
+    low_usage = pantry_usage < 0.4
+    many_loops = loops > 3
+    slow = runtimes > 10.0
+
+    score = np.ones(len(plans))
+    score = np.where(low_completeness, score - 0.3, score)
+    score = np.where(low_usage, score - 0.1, score)
+    score = np.where(many_loops, score - 0.2, score)
+    score = np.where(slow, score - 0.3, score)
+    score = np.maximum(score, 0.0)
+
+    results = []
+    for i in range(len(plans)):
+        feedback = []
+        if low_completeness[i]:
+            feedback.append(f"Low completeness ({completeness[i]:.2f}) — expected {expected_days} days.")
+
+        if forbidden_found[i] > 0 or off_diet[i] > 0:
+            _exclusion_feedback(feedback, int(forbidden_found[i]), int(off_diet[i]))
+            results.append({
+                "score": 0.0,
+                "completeness": float(completeness[i]),
+                "forbidden_found": int(forbidden_found[i] + off_diet[i]),
+                "feedback": feedback
+            })
+            continue
+
+        if low_usage[i]:
+            feedback.append(f"Low pantry usage ({pantry_usage[i]:.2f}) — try using pantry more.")
+        if many_loops[i]:
+            feedback.append(f"High loop count ({loops[i]}) — exceeds recommended ≤ 3.")
+        if slow[i]:
+            feedback.append(f"Slow runtime ({runtimes[i]:.2f}s). Must be under 10 seconds.")
+
+        results.append({
+            "score": float(score[i]),
+            "completeness": float(completeness[i]),
+            "forbidden_found": 0,
+            "feedback": feedback
+        })
+
+    return results
+
+
+def _exclusions(user_profile, store, exclusion, forbidden):
+    """(ExclusionFilter or None, excluded names) for a profile."""
+    if exclusion is None and isinstance(store, RecipeCatalog):
+        exclusion = exclusion_filter(store, user_profile)
+    if forbidden is None:
+        if exclusion is not None:
+            forbidden = exclusion.names
+        else:
+            forbidden = set(normalize_names(user_profile.get("forbidden", []))
+                            + normalize_names(user_profile.get("allergies", [])))
+    return exclusion, forbidden
+
+
+def _exclusion_feedback(feedback, forbidden_lines, off_diet):
+    if forbidden_lines:
+        feedback.append(f"Forbidden ingredients detected: {forbidden_lines}")
+    if off_diet:
+        feedback.append(f"Meals outside the dietary constraints: {off_diet}")
+
+
+def _nth(value, i):
+    # scalar, or one value per plan
+    return value[i] if isinstance(value, (list, tuple)) or hasattr(value, "shape") else value
@@ -0,0 +1,130 @@
+import sys, os
+# Add project root to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from evaluator import evaluate_plan, evaluate_plans
+from utils.catalog import RecipeCatalog
+
+RECIPES = [
+    {
+        "recipe_id": "v1",
+        "title": "Rice Bowl",
+        "ingredients": [
+            {"name": "rice", "qty": 200, "unit": "g"},
+            {"name": "onion", "qty": 1, "unit": "pcs"}
+        ],
+        "category": "vegetarian"
+    },
+    {
+        "recipe_id": "v2",
+        "title": "Peanut Noodles",
+        "ingredients": [
+            {"name": "noodles", "qty": 150, "unit": "g"},
+            {"name": "peanut", "qty": 30, "unit": "g"}
+        ],
+        "category": "vegetarian"
+    },
+    {
+        "recipe_id": "v3",
+        "title": "Mushroom Risotto",
+        "ingredients": [
+            {"name": "rice", "qty": 150, "unit": "g"},
+            {"name": "mushroom", "qty": 100, "unit": "g"}
+        ],
+        "category": "vegetarian"
+    },
+    {
+        "recipe_id": "m1",
+        "title": "Chicken Rice",
+        "ingredients": [
+            {"name": "chicken", "qty": 250, "unit": "g"},
+            {"name": "rice", "qty": 100, "unit": "g"}
+        ],
+        "category": "non-vegetarian"
+    }
+]
+
+PROFILE = {
+    "user_id": "eval_user",
+    "forbidden": ["Mushroom"],
+    "allergies": ["peanut"],
+    "dietary_constraints": ["vegetarian"]
+}
+
+INVENTORY = {
+    "rice": {"qty": 2, "unit": "kg", "qty_norm": 2000, "unit_norm": "g"},
+    "onion": {"qty": 10, "unit": "pcs", "qty_norm": 10, "unit_norm": "pcs"}
+}
+
+
+def _plan(recipe_ids):
+    by_id = {r["recipe_id"]: r for r in RECIPES}
+    return {"plan": [
+        {"day": f"Day {i + 1}", "meals": [dict(by_id[rid])]}
+        for i, rid in enumerate(recipe_ids)
+    ]}
+
+
+def _one_by_one(plans, loop_count=1, runtime=0.5, **kwargs):
+    return [evaluate_plan(plan, [], INVENTORY, PROFILE, loop_count, runtime, **kwargs)
+            for plan in plans]
+
+
+PLANS = {
+    "clean": _plan(["v1"] * 7),
+    "forbidden": _plan(["v1"] * 6 + ["v3"]),
+    "allergen": _plan(["v2", "v2"] + ["v1"] * 5),
+    "off_diet": _plan(["m1"] + ["v1"] * 6),
+    "short": _plan(["v1"] * 3),
+}
+
+
+def test_batch_matches_evaluate_plan():
+    store = RecipeCatalog(RECIPES)
+    plans = list(PLANS.values())
+
+    batch = evaluate_plans(plans, INVENTORY, PROFILE, 1, 0.5, store=store)
+    assert batch == _one_by_one(plans, store=store)
+
+    verdicts = dict(zip(PLANS, batch))
+    assert verdicts["clean"]["score"] == 1.0
+    assert verdicts["forbidden"]["forbidden_found"] == 1
+    assert verdicts["allergen"]["forbidden_found"] == 2
+    assert verdicts["off_diet"]["forbidden_found"] == 1
+    assert verdicts["short"]["completeness"] == pytest.approx(3 / 7)
+
+
+def test_per_plan_loops_and_runtime():
+    store = RecipeCatalog(RECIPES)
+    plans = [PLANS["clean"], PLANS["short"]]
+
+    batch = evaluate_plans(plans, INVENTORY, PROFILE, [1, 5], [0.5, 12.0], store=store)
+    assert batch[0] == _one_by_one(plans[:1], 1, 0.5, store=store)[0]
+    assert batch[1] == _one_by_one(plans[1:], 5, 12.0, store=store)[0]
+
+
+def test_edited_meal_is_checked_by_name():
+    store = RecipeCatalog(RECIPES)
+    edited = _plan(["v1"] * 7)
+    # same recipe_id, but peanuts added to the ingredients
+    meal = edited["plan"][0]["meals"][0]
+    meal["ingredients"] = meal["ingredients"] + [{"name": "Peanut", "qty": 10, "unit": "g"}]
+    plans = [PLANS["clean"], edited]
+
+    batch = evaluate_plans(plans, INVENTORY, PROFILE, 1, 0.5, store=store)
+    assert batch == _one_by_one(plans, store=store)
+    assert batch[1]["score"] == 0.0
+    assert batch[1]["forbidden_found"] == 1
+
+
+def test_zero_expected_days_is_complete():
+    store = RecipeCatalog(RECIPES)
+    plans = [PLANS["clean"], PLANS["short"]]
+
+    batch = evaluate_plans(plans, INVENTORY, PROFILE, 1, 0.5, store=store, expected_days=0)
+    assert batch == _one_by_one(plans, store=store, expected_days=0)
+    assert [r["completeness"] for r in batch] == [1.0, 1.0]
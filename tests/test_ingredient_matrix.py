@@ -0,0 +1,103 @@
+import sys, os
+# Add project root to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from agents.grocery_optimizer import GroceryOptimizerAgent
+from utils.recipe_store import RecipeStore
+
+# Fractional quantities: summing them in another order changes the
+# last bits (rice: 4 × 3.3 + 3 × 0.7 = 15.299999999999999, the meal-by-meal
+# sum is 15.299999999999997)
+RECIPES = [
+    {
+        "recipe_id": "f1",
+        "title": "Fractional Rice",
+        "ingredients": [
+            {"name": "rice", "qty": 3.3, "unit": "g"},
+            {"name": "milk", "qty": 0.1, "unit": "l"},
+            {"name": "onion", "qty": 1, "unit": "pcs"}
+        ],
+        "category": "vegetarian"
+    },
+    {
+        "recipe_id": "f2",
+        "title": "Fractional Spinach",
+        "ingredients": [
+            {"name": "spinach", "qty": 0.7, "unit": "kg"},
+            {"name": "rice", "qty": 0.7, "unit": "g"}
+        ],
+        "category": "vegetarian"
+    }
+]
+
+MEALS = ["f1", "f2", "f1", "f1", "f2", "f1", "f2"]
+
+
+def _plan(recipe_ids):
+    by_id = {r["recipe_id"]: r for r in RECIPES}
+    return {"plan": [
+        {"day": f"Day {i + 1}", "meals": [dict(by_id[rid])]}
+        for i, rid in enumerate(recipe_ids)
+    ]}
+
+
+def _optimizers():
+    store = RecipeStore(RECIPES)
+    return (GroceryOptimizerAgent(recipes=store),
+            GroceryOptimizerAgent(backend="numpy", recipes=store))
+
+
+def test_aggregate_matches_dict_path_exactly():
+    dict_opt, numpy_opt = _optimizers()
+    plan = _plan(MEALS)
+
+    expected = dict_opt.aggregate_ingredients(plan)
+    got = numpy_opt.aggregate_ingredients(plan)
+
+    assert list(got) == list(expected)
+    for name, q in expected.items():
+        assert got[name].qty == q.qty, name
+        assert got[name].unit == q.unit
+
+
+def test_compute_missing_matches_dict_path():
+    dict_opt, numpy_opt = _optimizers()
+    plan = _plan(MEALS)
+    aggregated = dict_opt.aggregate_ingredients(plan)
+
+    # Pantry holds exactly the dict-path totals: nothing may be missing
+    pantry = {name: {"qty_norm": q.qty} for name, q in aggregated.items()}
+    assert numpy_opt.compute_missing(numpy_opt.aggregate_ingredients(plan), pantry) == {}
+    assert dict_opt.compute_missing(aggregated, pantry) == {}
+
+    pantry = {"rice": {"qty_norm": 5.0}, "onion": {"qty_norm": 10}}
+    expected = dict_opt.compute_missing(aggregated, pantry)
+    got = numpy_opt.compute_missing(numpy_opt.aggregate_ingredients(plan), pantry)
+    assert got == expected
+
+
+def test_provenance_matches_dict_path():
+    dict_opt, numpy_opt = _optimizers()
+    plan = _plan(MEALS)
+
+    expected = dict_opt.aggregate_ingredients(plan, provenance=True)
+    got = numpy_opt.aggregate_ingredients(plan, provenance=True)
+    for name, q in expected.items():
+        assert [l.qty_norm for l in got[name].entries] == [l.qty_norm for l in q.entries]
+
+
+def test_aggregate_lists_ingredients_in_plan_order():
+    dict_opt, numpy_opt = _optimizers()
+    # spinach is the last matrix column but the first ingredient used
+    plan = _plan(["f2", "f1", "f2"])
+
+    expected = dict_opt.aggregate_ingredients(plan)
+    got = numpy_opt.aggregate_ingredients(plan)
+
+    assert list(got) == ["spinach", "rice", "milk", "onion"]
+    assert got == expected
+    assert [q.unit_norm for q in got.values()] == [q.unit_norm for q in expected.values()]
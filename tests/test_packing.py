@@ -0,0 +1,99 @@
+import sys, os
+# Add project root to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from itertools import product
+
+import pytest
+
+from agents.grocery_optimizer import GroceryOptimizerAgent
+from utils import packing
+from utils.packing import PackageTable
+
+
+def _brute_force(sizes, need):
+    """(least total, fewest packages) over every mix that could be optimal."""
+    # more than ceil(need / s) packages of size s always overshoots
+    limits = [range(-(-need // s) + 1) for s in sizes]
+    best = None
+    for counts in product(*limits):
+        total = sum(s * n for s, n in zip(sizes, counts))
+        if total >= need:
+            candidate = (total, sum(counts))
+            if best is None or candidate < best:
+                best = candidate
+    return best
+
+
+def test_rice_1100g_is_1000_plus_500():
+    assert PackageTable([500, 1000]).solve(1100) == (1500, [(1000, 1), (500, 1)])
+
+    optimizer = GroceryOptimizerAgent()
+    assert optimizer.pack("rice", 1100, "g") == (1500, "g", [(1000, 1), (500, 1)])
+    assert optimizer.round_to_package("rice", 1100, "g") == (1500, "g")
+
+
+def test_nothing_needed_buys_nothing():
+    assert PackageTable([500, 1000]).solve(0) == (0, [])
+
+
+def test_least_waste_then_fewest_packages():
+    rng = random.Random(7)
+    for _ in range(200):
+        sizes = sorted(rng.sample(range(3, 30), rng.randint(1, 3)))
+        need = rng.randint(1, 90)
+        total, packages = PackageTable(sizes).solve(need)
+
+        assert sum(size * n for size, n in packages) == total
+        assert (total, sum(n for _, n in packages)) == _brute_force(sizes, need)
+
+
+def test_cost_mode_prefers_the_cheapest_mix():
+    prices = {500: 5.0, 1000: 2.0}
+    table = PackageTable([500, 1000], prices)
+
+    assert table.solve(400) == (1000, [(1000, 1)])
+    assert table.cost([(1000, 1)]) == 2.0
+    # waste mode keeps the smaller package
+    assert PackageTable([500, 1000]).solve(400) == (500, [(500, 1)])
+
+
+def test_cost_mode_ties_go_to_the_least_waste():
+    table = PackageTable([500, 1000], {500: 1.0, 1000: 1.0})
+    assert table.solve(400) == (500, [(500, 1)])
+
+    table = PackageTable([6, 12], {6: 1.5, 12: 3.0})
+    total, packages = table.solve(13)
+    assert total == 18
+    assert table.cost(packages) == 4.5
+
+
+def test_cost_mode_in_the_optimizer():
+    optimizer = GroceryOptimizerAgent(minimize="cost")
+    total, unit, packages = optimizer.pack("egg", 13, "pcs")
+    assert (total, unit, packages) == (18, "pcs", [(12, 1), (6, 1)])
+    assert optimizer.item_cost("egg", total, unit, packages) == pytest.approx(4.5)
+
+
+def test_large_table_falls_back_to_the_anchor_package(monkeypatch):
+    # 509 × 509 + 509 amounts exceed MAX_TABLE_SIZE: no DP table
+    table = PackageTable([257, 509])
+    assert table.units is None
+    assert table.solve(600) == (1018, [(509, 2)])
+
+    monkeypatch.setattr(packing, "MAX_TABLE_SIZE", 4)
+    table = PackageTable([500, 1000])
+    assert table.units is None
+    assert table.solve(1100) == (2000, [(1000, 2)])
+
+
+def test_fractional_sizes_fall_back_to_the_anchor_package():
+    table = PackageTable([0.5, 1.5])
+    assert table.units is None
+    assert table.solve(2.2) == (3.0, [(1.5, 2)])
+
+
+def test_needs_positive_sizes():
+    with pytest.raises(ValueError):
+        PackageTable([0, -5])
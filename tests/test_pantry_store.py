@@ -0,0 +1,152 @@
+import sys, os
+# Add project root to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pickle
+
+import pytest
+
+from utils.pantry_store import DELTA_SUFFIX, PantryStore
+
+PANTRY = {
+    "items": [
+        {"name": "Rice", "qty": 1, "unit": "kg"},
+        {"name": "onion", "qty": 3, "unit": "pcs"}
+    ]
+}
+
+
+def _write(path, snapshot, deltas, tail=""):
+    """Snapshot + delta log on disk, as a store would have left them."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    with open(path + DELTA_SUFFIX, "w", encoding="utf-8") as f:
+        for delta in deltas:
+            f.write(json.dumps(delta) + "\n")
+        f.write(tail)
+
+
+def _logged(path):
+    with open(path + DELTA_SUFFIX, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_reopen_replays_the_log(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    with PantryStore.from_pantry(PANTRY, path=path) as store:
+        store.add("rice", 500, "g")
+        store.consume("onion", 1)
+        store.remove("rice")
+        store.add("Milk", 1, "l")
+        expected = dict(store.inventory())
+
+    assert [d["version"] for d in _logged(path)] == [1, 2, 3, 4]
+
+    with PantryStore(path) as reopened:
+        assert reopened.version == 4
+        assert reopened.inventory() == expected
+        assert reopened.get("milk")["qty_norm"] == 1000
+        # replayed deltas are folded into the snapshot
+        assert _logged(path) == []
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["version"] == 4
+
+
+def test_deltas_already_in_the_snapshot_are_skipped(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    snapshot = {"version": 3, "items": PantryStore.from_pantry(PANTRY).inventory()}
+    _write(path, snapshot, [
+        {"op": "add", "name": "rice", "qty": 100, "unit": "g", "version": 2},
+        {"op": "consume", "name": "onion", "qty": 1, "unit": "pcs", "version": 3},
+        {"op": "add", "name": "rice", "qty": 250, "unit": "g", "version": 4},
+    ])
+
+    with PantryStore(path) as store:
+        assert store.version == 4
+        assert store.get("rice")["qty_norm"] == 1250
+        assert store.get("onion")["qty_norm"] == 3
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    snapshot = {"version": 0, "items": PantryStore.from_pantry(PANTRY).inventory()}
+    _write(path, snapshot,
+           [{"op": "consume", "name": "onion", "qty": 2, "unit": "pcs", "version": 1}],
+           tail='{"op": "add", "name": "ri')
+
+    with PantryStore(path) as store:
+        assert store.version == 1
+        assert store.get("onion")["qty_norm"] == 1
+        assert _logged(path) == []
+        store.add("egg", 6)
+
+    # the next delta follows the last complete one
+    with PantryStore(path) as store:
+        assert store.version == 2
+        assert store.get("egg")["qty_norm"] == 6
+
+
+def test_inventory_is_copied_before_the_next_delta():
+    store = PantryStore.from_pantry(PANTRY)
+    before = store.inventory()
+    snapshot = json.dumps(before, sort_keys=True)
+
+    store.consume("rice", 200, "g")
+    store.remove("onion")
+
+    assert json.dumps(before, sort_keys=True) == snapshot
+    after = store.inventory()
+    assert after is not before
+    assert after["rice"]["qty_norm"] == 800
+    assert "onion" not in after
+
+    # every read is protected, not just the first one
+    store.add("rice", 200, "g")
+    store.add("rice", 200, "g")
+    assert store.get("rice")["qty_norm"] == 1200
+    assert after["rice"]["qty_norm"] == 800
+    assert before["rice"]["qty_norm"] == 1000
+
+
+def test_rejected_delta_leaves_the_store_unchanged(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    with PantryStore.from_pantry(PANTRY, path=path) as store:
+        with pytest.raises(ValueError):
+            store.add("rice", 1, "pcs")
+        with pytest.raises(ValueError):
+            store.apply({"op": "steal", "name": "rice"})
+
+        assert store.version == 0
+        assert store.get("rice")["qty_norm"] == 1000
+        assert _logged(path) == []
+
+
+def test_log_is_compacted_every_n_deltas(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    with PantryStore.from_pantry(PANTRY, path=path, compact_every=3) as store:
+        for _ in range(4):
+            store.add("onion", 1)
+
+        assert [d["version"] for d in _logged(path)] == [4]
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["version"] == 3
+
+    with PantryStore(path) as store:
+        assert store.get("onion")["qty_norm"] == 7
+
+
+def test_pickled_store_is_in_memory(tmp_path):
+    path = str(tmp_path / "pantry.json")
+    with PantryStore.from_pantry(PANTRY, path=path) as store:
+        store.add("rice", 500, "g")
+        copy = pickle.loads(pickle.dumps(store))
+
+    assert copy.path is None
+    assert copy.version == store.version
+    assert copy.inventory() == store.inventory()
+
+    copy.consume("rice", 1500, "g")
+    assert "rice" not in copy
+    assert [d["version"] for d in _logged(path)] == [1]
@@ -7,6 +7,7 @@ from agents.meal_planner import MealPlannerAgent
 from agents.pantry_checker import PantryCheckerAgent
 from agents.grocery_optimizer import GroceryOptimizerAgent
 from evaluator import evaluate_plan
+from utils.quantities import missing_to_json
 
 
 def run_test():
@@ -32,7 +33,7 @@ def run_test():
 
     # Output
     print("Generated 7-Day Test Meal Plan:\n", plan)
-    print("\nMissing Items:\n", missing)
+    print("\nMissing Items:\n", missing_to_json(missing))
     print("\nShopping List:\n", shopping_list)
     print("\nEvaluator Score:\n", eval_result)
 
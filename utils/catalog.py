@@ -0,0 +1,176 @@
+"""
+Compiled Recipe Catalog
+
+This module provides:
+- RecipeCatalog: a RecipeStore (utils/recipe_store.py) with what the
+  planner needs on top: admissible-recipe filtering over the ingredient
+  and category indexes, per-recipe base-unit needs, pantry coverage,
+  ingredient sets as integer bitsets over the catalog vocabulary (lazy),
+  category bits and exclusion masks for utils/exclusion.py
+- popcount: set bits of an int (ingredients two bitsets share)
+Used by MealPlannerAgent to filter recipes without re-scanning the catalog.
+"""
+
+import threading
+from typing import Dict, Any, Hashable, List, Iterable, Set
+from utils.recipe_store import RecipeStore
+
+try:
+    popcount = int.bit_count            # Python 3.10+
+except AttributeError:
+    def popcount(bits: int) -> int:
+        return bin(bits).count("1")
+
+
+# Serializes new vocabulary bits (planner threads and the evaluator may
+# extend one catalog at once). Module level: a catalog stays picklable.
+_VOCABULARY_LOCK = threading.Lock()
+
+
+class RecipeCatalog(RecipeStore):
+    """
+    RecipeStore plus the data the planner needs per request.
+
+    Every lookup the planner needs (forbidden ingredients, dietary
+    category, pantry coverage) is answered from the indexes instead of
+    normalizing every ingredient of every recipe again.
+    """
+
+    def __init__(self, recipes: Iterable[Dict[str, Any]] = ()):
+        # recipe_id -> {normalized ingredient: qty in base units}
+        self.base_needs: Dict[str, Dict[str, float]] = {}
+
+        # normalized ingredient (or ("category", name)) -> bit position;
+        # recipe_id -> bitset of its ingredients. Both filled on first use
+        # by ingredient_bits(): an int is as wide as its highest bit, so
+        # eager bitsets over a large vocabulary would cost ~1 KB per recipe.
+        self.vocabulary: Dict[Hashable, int] = {}
+        self._bits: Dict[str, int] = {}
+
+        # profile key -> compiled ExclusionFilter (utils/exclusion.py),
+        # dropped whenever the catalog changes
+        self.exclusions: Dict[str, Any] = {}
+        super().__init__(recipes)
+
+    def _index(self, recipe: Dict[str, Any]):
+        super()._index(recipe)
+        recipe_id = recipe["recipe_id"]
+
+        needs = {}
+        for line in self.ingredient_lines[recipe_id]:
+            needs[line.name] = needs.get(line.name, 0) + line.qty_norm
+        self.base_needs[recipe_id] = needs
+
+    def _unindex(self, recipe_id: str):
+        super()._unindex(recipe_id)
+        del self.base_needs[recipe_id]
+        self._bits.pop(recipe_id, None)
+
+    def _invalidate(self):
+        super()._invalidate()
+        self.exclusions.clear()
+
+    # ----------------------------------------
+    # Filtering
+    # ----------------------------------------
+    def excluded_ids(self, forbidden: Iterable[str]) -> Set[str]:
+        """Recipe ids containing any of the (normalized) forbidden ingredients."""
+        excluded = set()
+        for name in forbidden:
+            excluded |= self.ingredient_index.get(name, set())
+        return excluded
+
+    def admissible(self, forbidden: Iterable[str],
+                   diet: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Recipes free of forbidden ingredients and matching the diet,
+        in catalog order. Both arguments must already be normalized.
+        """
+        excluded = self.excluded_ids(forbidden)
+        diet = set(diet)
+
+        if not diet:
+            if not excluded:
+                return list(self.recipes)
+            return [r for r in self.recipes if r["recipe_id"] not in excluded]
+
+        allowed = set()
+        for category in diet:
+            allowed |= self.category_index.get(category, set())
+        allowed -= excluded
+
+        return self._ordered(allowed)
+
+    # ----------------------------------------
+    # Ingredient bitsets
+    # ----------------------------------------
+    def ingredient_bits(self, recipe_id: str) -> int:
+        """
+        Bitset of a recipe's ingredients over the catalog vocabulary
+        (bit positions are assigned in first-use order and never reused);
+        popcount(a & b) is the number of ingredients two recipes share.
+        """
+        bits = self._bits.get(recipe_id)
+        if bits is None:
+            bits = self.mask(self.ingredient_names[recipe_id])
+            self._bits[recipe_id] = bits
+        return bits
+
+    def category_bit(self, recipe_id: str) -> int:
+        """Single-bit set of a recipe's (normalized) category."""
+        return self.mask((("category", self.categories[recipe_id]),))
+
+    def signature(self, recipe_id: str) -> int:
+        """Ingredient bits plus category bit: what exclusion masks are tested against."""
+        return self.ingredient_bits(recipe_id) | self.category_bit(recipe_id)
+
+    def mask(self, keys: Iterable[Hashable]) -> int:
+        """
+        Bitset of vocabulary keys (normalized ingredient names, or
+        ("category", name)); unseen keys get new bits. A bit is never
+        freed and widens every bitset built after it, so pass keys the
+        catalog uses. Safe to call from several threads.
+        """
+        vocabulary = self.vocabulary
+        bits = 0
+        for key in keys:
+            bit = vocabulary.get(key)
+            if bit is None:
+                bit = self._new_bit(key)
+            bits |= 1 << bit
+        return bits
+
+    def _new_bit(self, key: Hashable) -> int:
+        # Checked again under the lock: another thread may have added key
+        with _VOCABULARY_LOCK:
+            vocabulary = self.vocabulary
+            bit = vocabulary.get(key)
+            if bit is None:
+                bit = vocabulary[key] = len(vocabulary)
+            return bit
+
+    # ----------------------------------------
+    # Pantry coverage
+    # ----------------------------------------
+    def coverage(self, recipe_id: str, pantry: Dict[str, float]) -> float:
+        """
+        Share of a recipe's need the pantry covers, averaged per ingredient
+        (so grams and pieces weigh the same). pantry: name -> qty in base units.
+        """
+        needs = self.base_needs[recipe_id]
+        if not needs:
+            return 1.0
+
+        covered = 0.0
+        for name, qty in needs.items():
+            have = pantry.get(name, 0)
+            if have >= qty:
+                covered += 1.0
+            elif have > 0:
+                covered += have / qty
+        return covered / len(needs)
+
+    def coverage_table(self, recipe_ids: Iterable[str],
+                       pantry: Dict[str, float]) -> Dict[str, float]:
+        """coverage() of every given recipe against one pantry."""
+        return {rid: self.coverage(rid, pantry) for rid in recipe_ids}
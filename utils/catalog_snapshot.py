@@ -0,0 +1,126 @@
+"""
+Precompiled Catalog Snapshots
+
+This module provides:
+- load_catalog_cached: RecipeCatalog for a recipe file, read from a
+  pickled snapshot when one matches the file, otherwise built with
+  recipe_loader.load_catalog and snapshotted for the next start
+- write_snapshot / read_snapshot: the snapshot file itself
+Used by data.get_recipe_catalog for file-backed catalogs.
+
+A snapshot holds the normalized, indexed catalog (ingredient lines,
+indexes, base needs), so later starts skip parsing, validation and
+normalization. It is keyed by the source file's path, size and mtime and
+by SNAPSHOT_VERSION; any mismatch (or an unreadable snapshot) rebuilds it.
+Bump SNAPSHOT_VERSION when the catalog's pickled layout changes.
+"""
+
+import gc
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+from utils.catalog import RecipeCatalog
+from utils.conversions import UNIT_NAMES, unit_code
+from utils.output_writer import atomic_open
+from utils.quantities import IngredientLine
+from utils.recipe_loader import load_catalog
+
+SNAPSHOT_VERSION = 5
+SNAPSHOT_SUFFIX = ".catalog.pickle"
+
+
+def snapshot_path_for(source: str) -> str:
+    """Default snapshot location: next to the source file."""
+    return source + SNAPSHOT_SUFFIX
+
+
+def _source_key(source: str, on_error: str) -> Dict[str, Any]:
+    stat = os.stat(source)
+    return {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.abspath(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "on_error": on_error
+    }
+
+
+class _SnapshotPickler(pickle.Pickler):
+    # Lines are stored with their raw unit code (plain constructor call on
+    # load) instead of IngredientLine.__getstate__'s unit name; the unit
+    # table saved in the header keeps the codes meaningful.
+    def reducer_override(self, obj):
+        if type(obj) is IngredientLine:
+            return IngredientLine, (obj.name, obj.qty_norm, obj.unit, obj.qty, obj.raw_unit)
+        return NotImplemented
+
+
+def write_snapshot(catalog: RecipeCatalog, path: str, key: Dict[str, Any]):
+    """Atomically writes header (key + unit table) and catalog, as two pickles."""
+    header = dict(key, units=list(UNIT_NAMES))
+    with atomic_open(path, binary=True) as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _SnapshotPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(catalog)
+
+
+def _units_match(units) -> bool:
+    # Register the snapshot's units in order; the stored codes are valid
+    # if this process numbers them the same way
+    return all(unit_code(name) == code for code, name in enumerate(units))
+
+
+def read_snapshot(path: str, key: Optional[Dict[str, Any]] = None) -> Optional[RecipeCatalog]:
+    """
+    Catalog stored in a snapshot, or None if it is missing, unreadable or
+    (when key is given) was built from a different source / version.
+    Only the small header is unpickled before the check.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            units = header.pop("units", None)
+            if key is not None and header != key:
+                return None
+            if units is None or not _units_match(units):
+                return None
+
+            # Unpickling allocates millions of containers and nothing
+            # cyclic; collector passes in between only cost time
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                catalog = pickle.load(f)
+            finally:
+                if enabled:
+                    gc.enable()
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+            TypeError, ValueError):
+        return None
+
+    return catalog if isinstance(catalog, RecipeCatalog) else None
+
+
+def load_catalog_cached(source: str, snapshot_path: Optional[str] = None,
+                        on_error: str = "raise") -> RecipeCatalog:
+    """
+    RecipeCatalog for a .jsonl / .csv (optionally .gz) recipe file.
+
+    The first call parses and compiles the file and writes the snapshot
+    (default: <source>.catalog.pickle); later calls load the snapshot as
+    long as the source file is unchanged. A snapshot that cannot be
+    written (read-only directory) is skipped silently.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(source)
+    key = _source_key(source, on_error)
+
+    catalog = read_snapshot(snapshot_path, key)
+    if catalog is not None:
+        return catalog
+
+    catalog = load_catalog(source, on_error=on_error)
+    try:
+        write_snapshot(catalog, snapshot_path, key)
+    except OSError:
+        pass
+    return catalog
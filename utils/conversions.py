@@ -4,39 +4,74 @@ Unit Conversion Utilities
 This module provides:
 - normalize units
 - convert qty + unit to a base unit
+- convert_many: bulk conversion of parallel qty / unit arrays (NumPy)
 Used by PantryCheckerAgent and GroceryOptimizerAgent.
+
+Every known spelling is listed once in UNIT_TABLE as
+alias -> (base unit, factor), so a conversion is a single dict lookup.
 """
 
-def normalize_unit(unit: str) -> str:
-    """
-    Normalize raw units to canonical units.
-    Supports g, kg -> g
-    Supports ml, liter -> ml
-    Supports pcs / piece
-    """
-    if not unit:
-        return "pcs"
+from typing import Dict, List, Tuple
+
+from utils.optional import load_numpy  # optional dependency, only convert_many needs it
 
-    u = unit.strip().lower()
 
+UNIT_TABLE: Dict[str, Tuple[str, float]] = {
     # weight
-    if u in ("g", "gram", "grams"):
-        return "g"
-    if u in ("kg", "kilogram", "kilograms"):
-        return "g"
+    "g": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "kilogram": ("g", 1000), "kilograms": ("g", 1000),
 
     # volume
-    if u in ("ml", "milliliter", "millilitre"):
-        return "ml"
-    if u in ("l", "liter", "litre"):
-        return "ml"
+    "ml": ("ml", 1), "milliliter": ("ml", 1), "millilitre": ("ml", 1),
+    "l": ("ml", 1000), "liter": ("ml", 1000), "litre": ("ml", 1000),
 
     # pieces
-    if u in ("pcs", "piece", "pieces", "count"):
-        return "pcs"
+    "pcs": ("pcs", 1), "piece": ("pcs", 1), "pieces": ("pcs", 1), "count": ("pcs", 1),
+}
+
+# Integer codes of base units, for array-backed callers.
+# Units outside UNIT_TABLE get the next free code on first use.
+UNIT_NAMES: List[str] = ["g", "ml", "pcs"]
+UNIT_CODES: Dict[str, int] = {name: code for code, name in enumerate(UNIT_NAMES)}
+
+# raw spelling (as passed in) -> (base unit, factor); seeded with the table
+_RESOLVED: Dict[str, Tuple[str, float]] = dict(UNIT_TABLE)
+_RESOLVED_LIMIT = 4096
+
+
+def _resolve(unit: str) -> Tuple[str, float]:
+    entry = _RESOLVED.get(unit)
+    if entry is not None:
+        return entry
+
+    if not unit:
+        return "pcs", 1
+
+    u = unit.strip().lower()
+    entry = UNIT_TABLE.get(u, (u, 1))   # fallback: unknown unit, no conversion
+
+    if len(_RESOLVED) < _RESOLVED_LIMIT:
+        _RESOLVED[unit] = entry
+    return entry
+
+
+def unit_code(unit_norm: str) -> int:
+    """Integer code of a base unit (registers unknown units)."""
+    code = UNIT_CODES.get(unit_norm)
+    if code is None:
+        code = UNIT_CODES[unit_norm] = len(UNIT_NAMES)
+        UNIT_NAMES.append(unit_norm)
+    return code
+
 
-    # fallback
-    return u
+def normalize_unit(unit: str) -> str:
+    """
+    Normalize raw units to canonical units.
+    Supports g, kg -> g
+    Supports ml, liter -> ml
+    Supports pcs / piece
+    """
+    return _resolve(unit)[0]
 
 
 def convert_to_base(qty: float, unit: str):
@@ -51,24 +86,43 @@ def convert_to_base(qty: float, unit: str):
     Returns:
         qty_norm, unit_norm
     """
-    unit_norm = normalize_unit(unit)
+    unit_norm, factor = _resolve(unit)
+    if factor == 1:
+        return qty, unit_norm
+    return qty * factor, unit_norm
 
-    # weight conversions
-    if unit_norm == "g":
-        if unit.lower() == "kg":
-            return qty * 1000, "g"
-        return qty, "g"
 
-    # volume conversions
-    if unit_norm == "ml":
-        if unit.lower() in ("l", "liter", "litre"):
-            return qty * 1000, "ml"
-        return qty, "ml"
+def convert_many(quantities, units):
+    """
+    Bulk convert_to_base over parallel arrays.
+
+    Each distinct unit spelling is resolved once; the per-item work is
+    NumPy indexing and one multiplication.
+
+    Returns:
+        base quantities (float64 array), unit codes (int array, see UNIT_NAMES)
+    """
+    np = load_numpy()
+    if np is None:
+        raise ImportError("convert_many requires numpy (pip install numpy)")
+
+    quantities = np.asarray(quantities, dtype=np.float64)
+    units = np.asarray(units)
+    if quantities.shape != units.shape:
+        raise ValueError("quantities and units must have the same shape")
+    if units.size == 0:
+        return quantities.copy(), np.zeros(quantities.shape, dtype=np.int64)
 
-    # piece count
-    if unit_norm == "pcs":
-        return qty, "pcs"
+    if units.dtype.kind != "U":
+        units = np.where(np.equal(units, None), "", units).astype(str)   # missing unit -> pcs
+    spellings, inverse = np.unique(units, return_inverse=True)
 
-    # fallback (no conversion)
-    return qty, unit_norm
+    factors = np.empty(len(spellings))
+    codes = np.empty(len(spellings), dtype=np.int64)
+    for i, spelling in enumerate(spellings):
+        unit_norm, factor = _resolve(spelling)
+        factors[i] = factor
+        codes[i] = unit_code(unit_norm)
 
+    inverse = inverse.reshape(units.shape)
+    return quantities * factors[inverse], codes[inverse]
@@ -0,0 +1,150 @@
+"""
+Compiled Exclusion Filters
+
+This module provides:
+- ExclusionFilter: a profile's forbidden ingredients, allergens and
+  dietary constraints compiled into one bitset (mask) over a
+  RecipeCatalog's vocabulary; admits(recipe_id) is a single mask test
+- exclusion_filter: the ExclusionFilter of (catalog, profile), cached on
+  the catalog per profile key
+- profile_key: hash of the profile fields a filter depends on
+Used by MealPlannerAgent (admissible candidates) and the evaluator
+(forbidden / allergen lines and off-diet meals in a plan).
+
+The mask holds the bits of every excluded ingredient some catalog
+recipe uses and, when the profile has dietary constraints, of every
+catalog category outside them.
+Constraints that name no catalog category (e.g. "vegan" in a catalog
+without that category) cannot be checked and are left out (ignored_diet);
+a profile whose constraints all miss restricts no category.
+A recipe is admissible when its signature (ingredient bits + category
+bit) shares no bit with the mask. Profiles with the same forbidden /
+allergies / dietary_constraints lists share one filter, so batch runs
+compile each distinct profile once per catalog.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.catalog import RecipeCatalog
+from utils.normalizer import normalize_name_cached, normalize_names
+from utils.stage_cache import fingerprint
+
+PROFILE_FIELDS = ("forbidden", "allergies", "dietary_constraints")
+
+# Filters cached per catalog; past this, new profiles are compiled but not kept
+EXCLUSION_CACHE_LIMIT = 4096
+
+# violations() of an admissible recipe
+ADMITTED = (0, False)
+
+
+class ExclusionFilter:
+    """
+    One profile's exclusions compiled against one RecipeCatalog.
+
+    names: normalized forbidden ingredients + allergens
+    diet:  normalized dietary categories present in the catalog
+           (empty = every category)
+    ignored_diet: constraints that name no catalog category
+
+    Verdicts are memoized per recipe; exclusion_filter hands out a fresh
+    filter once the catalog changes.
+    """
+
+    def __init__(self, catalog: RecipeCatalog, names: Iterable[str], diet: Iterable[str]):
+        self.catalog = catalog
+        self.names = frozenset(names)
+        diet = frozenset(diet)
+        self.diet = frozenset(c for c in diet if c in catalog.category_index)
+        self.ignored_diet = diet - self.diet
+
+        # Only names some recipe uses get a bit: no signature holds the
+        # others, and every bit widens all later bitsets. Edited meals are
+        # checked by name (meal_violations).
+        self.ingredient_mask = catalog.mask(n for n in self.names if n in catalog.ingredient_index)
+        if self.diet:
+            off_diet = set(catalog.category_index) - self.diet
+            self.category_mask = catalog.mask(("category", c) for c in off_diet)
+        else:
+            self.category_mask = 0
+        self.mask = self.ingredient_mask | self.category_mask
+
+        self._candidates: Optional[List[Dict[str, Any]]] = None
+        self._violations: Dict[str, Tuple[int, bool]] = {}
+
+    def admits(self, recipe_id: str) -> bool:
+        """True if a catalog recipe has no excluded ingredient and fits the diet."""
+        return self.violations(recipe_id) == ADMITTED
+
+    def meal_violations(self, meal: Dict[str, Any]) -> Optional[Tuple[int, bool]]:
+        """
+        violations() of a plan meal. A meal whose ingredients differ from
+        its catalog recipe's (RecipeStore.meal_lines) is checked line by
+        line by name, with its recipe's category. None outside the catalog.
+        """
+        recipe_id = meal.get("recipe_id")
+        recipe = self.catalog.by_id.get(recipe_id)
+        if recipe is None:
+            return None
+
+        ingredients = meal.get("ingredients")
+        if ingredients is None or ingredients == recipe["ingredients"]:
+            # Unchanged meal (same test as meal_lines, inlined: called per meal)
+            found = self._violations.get(recipe_id)
+            return found if found is not None else self.violations(recipe_id)
+
+        names = self.names
+        lines = sum(1 for ing in ingredients
+                    if normalize_name_cached(ing.get("name", "")) in names)
+        return lines, bool(self.catalog.category_bit(recipe_id) & self.category_mask)
+
+    def violations(self, recipe_id: str) -> Optional[Tuple[int, bool]]:
+        """
+        (forbidden / allergen ingredient lines, off diet) of a catalog
+        recipe — ADMITTED when it passes the mask test — or None for a
+        recipe outside the catalog.
+        """
+        found = self._violations.get(recipe_id)
+        if found is None:
+            catalog = self.catalog
+            if recipe_id not in catalog:
+                return None
+
+            if not catalog.signature(recipe_id) & self.mask:
+                found = ADMITTED
+            else:
+                names = self.names
+                lines = sum(1 for line in catalog.ingredient_lines[recipe_id] if line.name in names)
+                found = (lines, bool(catalog.category_bit(recipe_id) & self.category_mask))
+            self._violations[recipe_id] = found
+        return found
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """
+        Admissible recipes in catalog order, computed once per filter.
+        Listed through the catalog's inverted indexes, which only touch
+        the excluded ingredients / allowed categories (same result as
+        admits() on every recipe, without building every bitset).
+        """
+        if self._candidates is None:
+            self._candidates = self.catalog.admissible(self.names, self.diet)
+        return self._candidates
+
+
+def profile_key(user_profile: Dict[str, Any]) -> str:
+    """Hash of the profile fields an ExclusionFilter is compiled from."""
+    return fingerprint({field: user_profile.get(field, []) for field in PROFILE_FIELDS})
+
+
+def exclusion_filter(catalog: RecipeCatalog, user_profile: Dict[str, Any]) -> ExclusionFilter:
+    """ExclusionFilter of a profile, compiled on first use per catalog."""
+    key = profile_key(user_profile)
+    compiled = catalog.exclusions.get(key)
+    if compiled is None:
+        names = (normalize_names(user_profile.get("forbidden", []))
+                 + normalize_names(user_profile.get("allergies", [])))
+        diet = normalize_names(user_profile.get("dietary_constraints", []))
+        compiled = ExclusionFilter(catalog, names, diet)
+        if len(catalog.exclusions) < EXCLUSION_CACHE_LIMIT:
+            catalog.exclusions[key] = compiled
+    return compiled
@@ -0,0 +1,241 @@
+"""
+Ingredient Matrix (optional NumPy backend)
+
+This module provides:
+- IngredientMatrix: recipes pre-encoded as rows of a sparse
+  recipe × ingredient matrix (CSR layout) in base units
+- plan aggregation over the rows a plan uses
+- missing quantities as a vector subtraction against an encoded pantry
+- batch encoding of K plans as a K × S recipe-count matrix
+- store_matrix: the matrix of a RecipeStore, built once and cached on it
+Used by GroceryOptimizerAgent(backend="numpy") and evaluator.evaluate_plans.
+
+Requires numpy, imported when the first matrix is built. The module
+imports without it; building a matrix raises ImportError instead.
+"""
+
+from itertools import chain
+from typing import Dict, Any, List, Optional
+
+from utils.optional import load_numpy
+from utils.recipe_store import RecipeStore
+from utils.quantities import IngredientLine, Quantity
+
+np = None  # set by the first IngredientMatrix()
+
+
+class IngredientMatrix:
+    """
+    Sparse recipe × ingredient matrix.
+
+    Row r holds the base-unit quantities of recipe r; column c is one
+    normalized ingredient name. A plan becomes a recipe-count vector and
+    its aggregated needs are M^T · counts.
+    """
+
+    def __init__(self, recipes):
+        """recipes: RecipeStore (reuses its normalized lines) or recipe list."""
+        global np
+        np = load_numpy()
+        if np is None:
+            raise ImportError("IngredientMatrix requires numpy (pip install numpy)")
+
+        self.columns: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.ids: List[str] = []        # row -> recipe_id
+
+        # IngredientLine of every stored value (same order as data)
+        self.lines: List[IngredientLine] = []
+
+        indptr = [0]
+        indices = []
+        data = []
+
+        store = recipes if isinstance(recipes, RecipeStore) else RecipeStore(recipes)
+        self.store = store
+
+        for recipe_id in store.ids():
+            for line in store.ingredient_lines[recipe_id]:
+                col = self.columns.get(line.name)
+                if col is None:
+                    col = self.columns[line.name] = len(self.names)
+                    self.names.append(line.name)
+
+                indices.append(col)
+                data.append(line.qty_norm)
+                self.lines.append(line)
+
+            self.rows[recipe_id] = len(self.ids)
+            self.ids.append(recipe_id)
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+
+    def __setstate__(self, state):
+        # unpickled in another process: no constructor ran there
+        global np
+        np = load_numpy()
+        self.__dict__.update(state)
+
+    @property
+    def shape(self):
+        return len(self.ids), len(self.names)
+
+    # ----------------------------------------
+    # Encoding
+    # ----------------------------------------
+    def plan_rows(self, plan: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        Row of every meal in plan order, or None if a recipe is unknown or
+        a meal's ingredients differ from its recipe's (RecipeStore.meal_lines).
+        """
+        # RecipeStore.meal_lines inlined: this runs once per meal
+        by_id = self.store.by_id
+        get_row = self.rows.get
+        rows = []
+        for day in plan.get("plan", []):
+            for meal in day.get("meals", []):
+                recipe_id = meal.get("recipe_id")
+                row = get_row(recipe_id)
+                if row is None:
+                    return None
+                ingredients = meal.get("ingredients")
+                if ingredients is not None:
+                    stored = by_id[recipe_id]["ingredients"]
+                    if ingredients is not stored and ingredients != stored:
+                        return None
+                rows.append(row)
+        return rows
+
+    def encode_plans(self, plans: List[Dict[str, Any]]):
+        """
+        K plans as a K × S recipe-count matrix over the S distinct recipes
+        they use. Returns (selected rows, counts), or None if plan_rows
+        is None for any plan.
+        """
+        plan_rows = []
+        for plan in plans:
+            rows = self.plan_rows(plan)
+            if rows is None:
+                return None
+            plan_rows.append(rows)
+
+        flat = np.fromiter(chain.from_iterable(plan_rows), dtype=np.int64)
+        owner = np.repeat(np.arange(len(plan_rows)), [len(rows) for rows in plan_rows])
+        selected, position = np.unique(flat, return_inverse=True)
+
+        counts = np.zeros((len(plan_rows), len(selected)))
+        np.add.at(counts, (owner, position), 1)
+        return selected, counts
+
+    def encode_pantry(self, pantry: Dict[str, Any]):
+        """Base-unit pantry quantities as a vector over the ingredient columns."""
+        have = np.zeros(self.shape[1])
+        for name, info in pantry.items():
+            col = self.columns.get(name)
+            if col is not None:
+                have[col] = info.get("qty_norm", 0)
+        return have
+
+    # ----------------------------------------
+    # Products
+    # ----------------------------------------
+    def row_values(self, selected):
+        """Positions of the stored values of the given rows, and row lengths."""
+        starts = self.indptr[selected]
+        lengths = self.indptr[selected + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum()), lengths
+
+    def sub_totals(self, selected, counts, weights=None):
+        """
+        counts (K × S, over the rows in `selected`) times the matching
+        submatrix, restricted to the C ingredient columns those rows touch.
+
+        weights: one value per stored entry (default: base-unit quantities;
+        pass ones to count ingredient lines instead).
+        Returns (columns, K × C totals).
+        """
+        values, lengths = self.row_values(selected)
+        owner = np.repeat(np.arange(len(selected)), lengths)
+        columns, position = np.unique(self.indices[values], return_inverse=True)
+
+        data = (self.data if weights is None else weights)[values]
+        out = np.zeros((counts.shape[0], len(columns)))
+        np.add.at(out, (slice(None), position), counts[:, owner] * data)
+        return columns, out
+
+    # ----------------------------------------
+    # Same outputs as the GroceryOptimizerAgent dict path
+    # ----------------------------------------
+    def aggregate(self, plan: Dict[str, Any],
+                  provenance: bool = False) -> Optional[Dict[str, Quantity]]:
+        """
+        Aggregated ingredients in the GroceryOptimizerAgent shape,
+        or None if the plan uses a recipe outside the matrix or an
+        edited meal (the dict path handles those).
+        """
+        rows = self.plan_rows(plan)
+        if rows is None:
+            return None
+        if not rows:
+            return {}
+
+        # One stored value per meal line, in plan order
+        values, _ = self.row_values(np.asarray(rows, dtype=np.int64))
+
+        if provenance:
+            aggregated = {}
+            lines = self.lines
+            for v in values.tolist():
+                line = lines[v]
+                q = aggregated.get(line.name)
+                if q is None:
+                    q = aggregated[line.name] = Quantity(0.0, line.unit, [])
+                q.add(line)
+            return aggregated
+
+        # bincount adds the values in plan order, as the dict path does,
+        # so the totals match it bit for bit; the columns are listed in
+        # the order the plan first uses them, with that line's unit.
+        columns, first, position = np.unique(self.indices[values], return_index=True,
+                                             return_inverse=True)
+        totals = np.bincount(position, weights=self.data[values])
+        order = np.argsort(first)
+
+        names = self.names
+        lines = self.lines
+        return {
+            names[col]: Quantity(total, lines[v].unit)
+            for col, total, v in zip(columns[order].tolist(), totals[order].tolist(),
+                                     values[first[order]].tolist())
+        }
+
+    def compute_missing(self, aggregated: Dict[str, Quantity],
+                        pantry: Dict[str, Any]) -> Dict[str, Quantity]:
+        """Missing quantities as one vector subtraction (need − have)."""
+        names = list(aggregated)
+        need = np.fromiter((aggregated[n].qty for n in names),
+                           dtype=np.float64, count=len(names))
+        have = np.fromiter((pantry.get(n, {}).get("qty_norm", 0) for n in names),
+                           dtype=np.float64, count=len(names))
+        short = np.maximum(0, need - have)
+
+        return {
+            names[i]: Quantity(float(short[i]), aggregated[names[i]].unit)
+            for i in np.flatnonzero(short > 0)
+        }
+
+
+def store_matrix(store: RecipeStore) -> IngredientMatrix:
+    """
+    IngredientMatrix of a store, built on first use and kept on the store
+    (RecipeStore.matrix) until the store changes.
+    """
+    matrix = store.matrix
+    if matrix is None:
+        matrix = store.matrix = IngredientMatrix(store)
+    return matrix
@@ -3,10 +3,23 @@ Ingredient & Name Normalization Utilities
 
 This module provides:
 - normalize_name: clean ingredient names
+- normalize_name_cached: memoized normalize_name (bounded LRU cache)
+- normalize_names: batch variant over a list of names
+  (cached results are interned: equal names share one string object)
 - safe_compare: compare ingredients consistently
 """
 
 import re
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# Upper bound on distinct names kept by normalize_name_cached
+NORMALIZE_CACHE_SIZE = 8192
+
+_TRAILING_PUNCT = re.compile(r"[.,;:!?]*$")
+_WHITESPACE = re.compile(r"\s+")
+
 
 def normalize_name(name: str) -> str:
     """
@@ -33,10 +46,10 @@ def normalize_name(name: str) -> str:
     n = n.replace("-", " ").replace("_", " ")
 
     # remove trailing punctuation
-    n = re.sub(r"[.,;:!?]*$", "", n)
+    n = _TRAILING_PUNCT.sub("", n)
 
     # collapse multiple spaces
-    n = re.sub(r"\s+", " ", n).strip()
+    n = _WHITESPACE.sub(" ", n).strip()
 
     # singularize (simple heuristic)
     if n.endswith("s") and len(n) > 3:
@@ -45,9 +58,46 @@ def normalize_name(name: str) -> str:
     return n
 
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(name: str) -> str:
+    return sys.intern(normalize_name(name))
+
+
+def normalize_name_cached(name: str) -> str:
+    """
+    Memoized normalize_name().
+    Repeated names cost a single dictionary lookup.
+    """
+    if not name:
+        return ""
+    return _normalize_cached(name)
+
+
+def normalize_names(names: Iterable[str]) -> List[str]:
+    """Normalize a whole list of names in one pass, through the cache."""
+    cached = _normalize_cached
+    return [cached(n) if n else "" for n in names]
+
+
+def normalizer_cache_stats() -> Dict[str, int]:
+    """Hit / miss counters of the normalize_name cache."""
+    info = _normalize_cached.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize
+    }
+
+
+def clear_normalizer_cache():
+    """Drop all cached names and reset the counters."""
+    _normalize_cached.cache_clear()
+
+
 def safe_compare(a: str, b: str) -> bool:
     """
     Case-insensitive, punctuation-insensitive comparison.
-    Uses normalize_name() internally.
+    Uses normalize_name_cached() internally.
     """
-    return normalize_name(a) == normalize_name(b)
+    return normalize_name_cached(a) == normalize_name_cached(b)
@@ -0,0 +1,24 @@
+"""
+Optional Dependencies
+
+This module provides:
+- load_numpy: the numpy module, imported on first call (None if missing)
+Used by conversions.convert_many, IngredientMatrix and
+evaluator.evaluate_plans, so importing the agents or app does not pay
+numpy's import time unless a NumPy path actually runs.
+"""
+
+_MISSING = object()
+_numpy = _MISSING
+
+
+def load_numpy():
+    """numpy, or None when it is not installed."""
+    global _numpy
+    if _numpy is _MISSING:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
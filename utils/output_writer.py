@@ -0,0 +1,126 @@
+"""
+Output Persistence
+
+This module provides:
+- atomic_open: write a file through a temp file + rename, so readers
+  never see a half-written output (a crash leaves the old file intact)
+- write_json / write_csv: atomic JSON (indented or compact) and CSV writers
+- TraceWriter: append-only JSONL sink, one record per line, flushed as
+  each record is written
+Used by app.py for meal_plan.json, shopping_list.csv, traces.jsonl and
+batch results.
+
+Paths ending in ".gz" are gzip-compressed.
+"""
+
+import csv
+import gzip
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _open_text(path: str, mode: str, compress: Optional[bool] = None):
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _dumps(obj: Any, compact: bool) -> str:
+    if compact:
+        return json.dumps(obj, separators=(",", ":"), default=str)
+    return json.dumps(obj, indent=2, default=str)
+
+
+@contextmanager
+def atomic_open(path: str, binary: bool = False):
+    """
+    Text (or binary) file handle whose content replaces `path` only once
+    the block finishes without error (temp file in the same directory,
+    fsync, os.replace). On error the temp file is removed.
+    """
+    # Unique name next to the target (same filesystem → atomic rename);
+    # created with open() so it gets the usual umask permissions
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+
+    try:
+        if binary:
+            handle = open(tmp, "wb")
+        else:
+            handle = _open_text(tmp, "w", compress=path.endswith(".gz"))
+        with handle as f:
+            yield f
+
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_json(obj: Any, path: str, compact: bool = False):
+    """Atomic JSON write; indent=2 unless compact."""
+    with atomic_open(path) as f:
+        f.write(_dumps(obj, compact))
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], fieldnames: List[str], path: str):
+    """Atomic CSV write of dict rows."""
+    with atomic_open(path) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+class TraceWriter:
+    """
+    Streams records to a JSONL file as they are produced.
+
+    Every write() is flushed, so a crash keeps all completed records;
+    nothing is held in memory. The file is truncated on open unless
+    append=True.
+
+        with TraceWriter("output/traces.jsonl") as sink:
+            sink.write({"loop": 1, ...})
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.count = 0
+        self._file = _open_text(path, "a" if append else "w")
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(_dumps(record, compact=True))
+        self._file.write("\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Records of a JSONL (optionally .gz) file; a truncated last line is skipped."""
+    records = []
+    with _open_text(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
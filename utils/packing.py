@@ -0,0 +1,140 @@
+"""
+Package Packing Solver
+
+This module provides:
+- PackageTable: for one ingredient's package sizes, the package mix that
+  covers a need with the least waste, then the fewest packages — or, when
+  package prices are given, the cheapest mix (then the least waste)
+Used by GroceryOptimizerAgent.round_to_package / pack.
+
+Sizes are scaled down by their gcd and an exact DP table (fewest packages,
+or lowest cost, per amount) is built once per ingredient. Let A be the
+"anchor" package with the best weight per unit (the largest size when
+counting packages, the best price per unit when pricing). An optimal mix
+holds fewer than A non-anchor packages — otherwise a subset of them sums
+to a multiple of A and can be swapped for anchor packages at no extra
+weight — so the table only needs to cover about A × largest amounts;
+larger amounts reduce into it by removing anchor packages.
+"""
+
+from math import ceil, gcd
+from functools import reduce
+from typing import Dict, List, Optional, Tuple
+
+# Largest DP table (in gcd units) built for one ingredient. Size lists whose
+# table would be bigger fall back to repeating the anchor package.
+MAX_TABLE_SIZE = 1 << 16
+
+_UNREACHABLE = float("inf")
+
+
+class PackageTable:
+    """Precomputed packing for one list of package sizes."""
+
+    def __init__(self, sizes: List[float], prices: Optional[Dict[float, float]] = None):
+        """
+        sizes: package sizes in base units
+        prices: optional {size: price}; solve() then minimizes cost
+        """
+        sizes = sorted(set(s for s in sizes if s > 0))
+        if not sizes:
+            raise ValueError("PackageTable needs at least one positive size")
+
+        self.sizes = sizes
+        self.prices = [prices[s] for s in sizes] if prices else None
+        weights = self.prices or [1] * len(sizes)
+
+        self.units = None
+        if all(float(s).is_integer() for s in sizes):
+            self.step = reduce(gcd, [int(s) for s in sizes])
+            units = [int(s) // self.step for s in sizes]
+        else:
+            self.step = None
+            units = list(sizes)
+
+        # best weight per unit; ties → larger package
+        self.anchor = min(range(len(sizes)), key=lambda i: (weights[i] / units[i], -units[i]))
+
+        table_size = units[self.anchor] * units[-1] + units[-1]
+        if self.step is None or table_size > MAX_TABLE_SIZE:
+            return
+
+        # weight[a]: fewest packages / lowest cost summing to exactly a
+        # last[a]: index of the size used last in that mix
+        weight = [_UNREACHABLE] * table_size
+        last = [-1] * table_size
+        weight[0] = 0
+        for amount in range(1, table_size):
+            best, best_i = _UNREACHABLE, -1
+            for i, unit in enumerate(units):
+                if unit <= amount and weight[amount - unit] + weights[i] < best:
+                    best, best_i = weight[amount - unit] + weights[i], i
+            weight[amount] = best
+            last[amount] = best_i
+
+        self.units = units
+        self.weight = weight
+        self.last = last
+        self.table_size = table_size
+
+    def _reduce(self, amount: int) -> Tuple[int, int]:
+        """(amount inside the table, number of anchor packages removed)."""
+        if amount < self.table_size:
+            return amount, 0
+        anchor = self.units[self.anchor]
+        removed = (amount - self.table_size) // anchor + 1
+        return amount - removed * anchor, removed
+
+    def solve(self, need: float) -> Tuple[float, List[Tuple[float, int]]]:
+        """
+        Returns (total bought, [(size, n_packages), ...]) covering `need`:
+        least total then fewest packages, or lowest cost then least total
+        when the table has prices.
+        """
+        if need <= 0:
+            return 0, []
+
+        if self.units is None:
+            # Irregular sizes: repeat the anchor package
+            size = self.sizes[self.anchor]
+            n = int(ceil(need / size))
+            return n * size, [(size, n)]
+
+        largest = self.units[-1]
+        target = int(ceil(need / self.step - 1e-9))
+
+        # Covering more than target + largest is never needed: dropping a
+        # package would still cover the need. A multiple of the largest
+        # size lies in this window, so some amount is always reachable.
+        best = None
+        for amount in range(target, target + largest):
+            reduced, extra = self._reduce(amount)
+            weight = self.weight[reduced]
+            if weight == _UNREACHABLE:
+                continue
+            if self.prices is None:
+                best = (amount, reduced, extra)
+                break
+            weight += extra * self.prices[self.anchor]
+            if best is None or weight < best[3]:
+                best = (amount, reduced, extra, weight)
+
+        amount, reduced, extra = best[:3]
+        return amount * self.step, self._packages(reduced, extra)
+
+    def cost(self, packages: List[Tuple[float, int]]) -> Optional[float]:
+        """Price of a package mix (None without prices)."""
+        if self.prices is None:
+            return None
+        price_of = dict(zip(self.sizes, self.prices))
+        return sum(price_of[size] * n for size, n in packages)
+
+    def _packages(self, amount: int, extra_anchor: int) -> List[Tuple[float, int]]:
+        used: Dict[int, int] = {}
+        if extra_anchor:
+            used[self.anchor] = extra_anchor
+        while amount > 0:
+            i = self.last[amount]
+            used[i] = used.get(i, 0) + 1
+            amount -= self.units[i]
+        return [(self.sizes[i], used[i]) for i in sorted(used, reverse=True)]
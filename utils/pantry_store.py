@@ -0,0 +1,254 @@
+"""
+Persistent Pantry Store
+
+This module provides:
+- PantryStore: normalized pantry inventory kept up to date by deltas
+  (add / consume / remove) instead of being rebuilt from the raw items
+Used by PantryCheckerAgent (pass a PantryStore instead of a pantry dict)
+and app.plan_for_user, which keys the pantry stage on the store version.
+
+On disk (optional, path given):
+    <path>                 normalized snapshot {"version", "items"}
+    <path>.deltas.jsonl    one line per delta applied since the snapshot
+
+Each delta normalizes and converts only the item it touches, and a read
+hands out the current inventory without converting anything. Opening a
+store loads the snapshot and replays the newer deltas. compact() folds
+the log into a new snapshot. This happens automatically every
+compact_every deltas and after a replay.
+
+Inventory dicts returned by inventory() are never modified afterwards:
+the first delta after a read works on a copy (copy-on-write), so plans,
+caches and worker processes that hold an older inventory stay consistent.
+
+A store can be pickled (e.g. passed to app.run_batch): the copy keeps the
+items and version but not the path, so its deltas are not persisted.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from utils.conversions import convert_to_base
+from utils.normalizer import normalize_name_cached
+from utils.output_writer import TraceWriter, read_jsonl, write_json
+
+DELTA_SUFFIX = ".deltas.jsonl"
+
+OPS = ("add", "consume", "remove")
+
+
+class PantryStore:
+    """Normalized inventory + version counter, optionally persisted."""
+
+    def __init__(self, path: Optional[str] = None, compact_every: int = 1000):
+        if compact_every < 1:
+            raise ValueError("compact_every must be >= 1")
+
+        self.path = path
+        self.compact_every = compact_every
+        self.version = 0
+
+        # name -> {"qty", "unit", "qty_norm", "unit_norm"} (PantryCheckerAgent shape)
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._shared = False    # _items was handed out; copy before the next change
+        self._pending = 0       # deltas logged since the last snapshot
+        self._log: Optional[TraceWriter] = None
+
+        if path is not None:
+            self._load()
+
+    @classmethod
+    def from_pantry(cls, pantry_data: Dict[str, Any], path: Optional[str] = None,
+                    compact_every: int = 1000) -> "PantryStore":
+        """
+        Store holding a PANTRY_SAMPLE-shaped pantry (later items with the
+        same name replace earlier ones, as in read_inventory). An existing
+        store at `path` is overwritten.
+        """
+        store = cls(compact_every=compact_every)
+        for item in pantry_data.get("items", []):
+            name = normalize_name_cached(item.get("name", ""))
+            store._items[name] = _entry(item.get("qty", 0), item.get("unit", "pcs"))
+
+        if path is not None:
+            store.path = path
+            store.compact()
+        return store
+
+    # ----------------------------------------
+    # Reads
+    # ----------------------------------------
+    def inventory(self) -> Dict[str, Dict[str, Any]]:
+        """Current inventory (shared: do not modify it)."""
+        self._shared = True
+        return self._items
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._items.get(normalize_name_cached(name))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name_cached(name) in self._items
+
+    # ----------------------------------------
+    # Deltas
+    # ----------------------------------------
+    def add(self, name: str, qty: float, unit: str = "pcs") -> int:
+        """Adds qty unit of name; returns the new version."""
+        return self.apply({"op": "add", "name": name, "qty": qty, "unit": unit})
+
+    def consume(self, name: str, qty: float, unit: str = "pcs") -> int:
+        """
+        Takes qty unit of name out of the pantry (at most what is there;
+        the item is dropped when nothing is left). Returns the new version.
+        """
+        return self.apply({"op": "consume", "name": name, "qty": qty, "unit": unit})
+
+    def remove(self, name: str) -> int:
+        """Drops name from the pantry; returns the new version."""
+        return self.apply({"op": "remove", "name": name})
+
+    def apply(self, delta: Dict[str, Any]) -> int:
+        """
+        Applies one {"op", "name"[, "qty", "unit"]} delta and logs it.
+        Raises ValueError for an unknown op or a unit that does not match
+        the stored item; the store is unchanged in that case.
+        """
+        name, entry = _resolve_delta(self._items, delta)
+
+        record = dict(delta, version=self.version + 1)
+        if self._log is not None:
+            self._log.write(record)
+            self._pending += 1
+
+        self._set(name, entry)
+        self.version += 1
+
+        if self._log is not None and self._pending >= self.compact_every:
+            self.compact()
+        return self.version
+
+    def apply_many(self, deltas: Iterable[Dict[str, Any]]) -> int:
+        """apply() for each delta in order; returns the final version."""
+        for delta in deltas:
+            self.apply(delta)
+        return self.version
+
+    def _set(self, name: str, entry: Optional[Dict[str, Any]]):
+        if self._shared:
+            self._items = dict(self._items)
+            self._shared = False
+
+        if entry is None:
+            self._items.pop(name, None)
+        else:
+            self._items[name] = entry
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+    @property
+    def delta_path(self) -> Optional[str]:
+        return None if self.path is None else self.path + DELTA_SUFFIX
+
+    def compact(self):
+        """Writes the snapshot (atomically) and starts an empty delta log."""
+        if self.path is None:
+            return
+
+        self.close()
+        write_json({"version": self.version, "items": self._items}, self.path, compact=True)
+        self._log = TraceWriter(self.delta_path)
+        self._pending = 0
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self) -> "PantryStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        # A pickled store (e.g. sent to a run_batch worker) is an in-memory
+        # copy: same items and version, no path, nothing logged
+        return dict(self.__dict__, path=None, _log=None, _pending=0, _shared=False)
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.version = snapshot.get("version", 0)
+            self._items = snapshot.get("items", {})
+
+        logged = os.path.exists(self.delta_path) and os.path.getsize(self.delta_path) > 0
+        if logged:
+            for record in read_jsonl(self.delta_path):
+                # Deltas already folded into the snapshot (crash between
+                # snapshot and log truncation) are skipped
+                if record.get("version", 0) <= self.version:
+                    continue
+                name, entry = _resolve_delta(self._items, record)
+                self._set(name, entry)
+                self.version = record["version"]
+
+        if logged or not os.path.exists(self.path):
+            # Folding the log into the snapshot also drops a torn last line
+            self.compact()
+        else:
+            self._log = TraceWriter(self.delta_path, append=True)
+
+
+# ----------------------------------------
+# Helpers
+# ----------------------------------------
+def _entry(qty: float, unit: str, qty_norm: Optional[float] = None,
+           unit_norm: Optional[str] = None) -> Dict[str, Any]:
+    if qty_norm is None:
+        qty_norm, unit_norm = convert_to_base(qty, unit)
+    return {"qty": qty, "unit": unit, "qty_norm": qty_norm, "unit_norm": unit_norm}
+
+
+def _resolve_delta(items: Dict[str, Dict[str, Any]], delta: Dict[str, Any]):
+    """(normalized name, new entry or None to drop) for a delta; items is not modified."""
+    op = delta.get("op")
+    if op not in OPS:
+        raise ValueError(f"Unknown pantry op {op!r}, expected one of {OPS}")
+
+    name = normalize_name_cached(delta.get("name", ""))
+    current = items.get(name)
+    if op == "remove":
+        return name, None
+
+    qty = delta.get("qty", 0)
+    unit = delta.get("unit", "pcs")
+    qty_norm, unit_norm = convert_to_base(qty, unit)
+    if qty_norm < 0:
+        raise ValueError(f"Pantry {op} of {name!r} needs a non-negative qty, got {qty}")
+
+    if current is None:
+        if op == "add":
+            return name, _entry(qty, unit, qty_norm, unit_norm)
+        return name, None   # consuming something that is not there
+
+    if current["unit_norm"] != unit_norm:
+        raise ValueError(f"Cannot {op} {unit!r} of {name!r}: stored in {current['unit_norm']!r}")
+
+    if op == "add":
+        total = current["qty_norm"] + qty_norm
+        if unit == current["unit"]:
+            return name, _entry(current["qty"] + qty, unit, total, unit_norm)
+        return name, _entry(total, unit_norm, total, unit_norm)
+
+    left = current["qty_norm"] - qty_norm
+    if left <= 0:
+        return name, None
+    if unit == current["unit"]:
+        return name, _entry(current["qty"] - qty, unit, left, unit_norm)
+    return name, _entry(left, unit_norm, left, unit_norm)
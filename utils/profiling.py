@@ -0,0 +1,159 @@
+"""
+Opt-in Stage Profiling
+
+This module provides:
+- StageProfiler: runs orchestrator stages under cProfile and tracemalloc
+  and writes, per loop or per stage,
+      profile_loop<N>[_<stage>].pstats      (open with pstats / snakeviz)
+      profile_loop<N>[_<stage>].alloc.txt   (top-N allocation sites)
+- profiler_from_env: StageProfiler configured by environment variables
+Used by app.run_orchestrator (profile="loop" / "stage", or
+MEAL_AGENT_PROFILE=loop|stage without code changes).
+
+cProfile only sees the thread it is enabled on, so each stage call is
+profiled on the thread that runs it (run()). In "loop" mode the stage
+profiles of a loop are merged into one file. tracemalloc is process-wide:
+allocation reports of stages that run concurrently (pantry and planner)
+include each other's allocations.
+"""
+
+import cProfile
+import os
+import pstats
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_ENV = "MEAL_AGENT_PROFILE"
+PROFILE_TOP_ENV = "MEAL_AGENT_PROFILE_TOP"
+
+MODES = ("loop", "stage")
+
+
+class StageProfiler:
+    """cProfile + tracemalloc around orchestrator stages."""
+
+    def __init__(self, mode: str = "stage", output_dir: str = "output", top_n: int = 20):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+
+        self.mode = mode
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.files: List[str] = []
+
+        self._lock = threading.Lock()
+        self._loop_profiles: Dict[int, List[cProfile.Profile]] = {}
+        self._loop_snapshots: Dict[int, tracemalloc.Snapshot] = {}
+
+        # Leave tracemalloc running if the caller had started it
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+
+    # ----------------------------------------
+    # Hooks
+    # ----------------------------------------
+    def run(self, loop: int, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(*args, **kwargs) profiled on the calling thread."""
+        before = _snapshot() if self.mode == "stage" else None
+        profile = cProfile.Profile()
+
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+
+            if self.mode == "stage":
+                label = f"profile_loop{loop}_{stage}"
+                self._write(label, pstats.Stats(profile), before, _snapshot())
+            else:
+                with self._lock:
+                    self._loop_profiles.setdefault(loop, []).append(profile)
+
+    def start_loop(self, loop: int):
+        if self.mode == "loop":
+            self._loop_snapshots[loop] = _snapshot()
+
+    def end_loop(self, loop: int):
+        """Loop mode: write the merged stage profiles of the loop."""
+        if self.mode != "loop":
+            return
+
+        with self._lock:
+            profiles = self._loop_profiles.pop(loop, [])
+        before = self._loop_snapshots.pop(loop, None)
+        if not profiles:
+            return
+
+        after = _snapshot()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        self._write(f"profile_loop{loop}", stats, before, after)
+
+    def close(self):
+        """Stop tracemalloc (if this profiler started it)."""
+        if self._owns_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracemalloc = False
+
+    # ----------------------------------------
+    # Output
+    # ----------------------------------------
+    def _write(self, label: str, stats: pstats.Stats,
+               before: Optional[tracemalloc.Snapshot], after: Optional[tracemalloc.Snapshot]):
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        stats_path = os.path.join(self.output_dir, label + ".pstats")
+        stats.dump_stats(stats_path)
+        written = [stats_path]
+
+        # after is None when the section ended after close()
+        if after is not None:
+            alloc_path = os.path.join(self.output_dir, label + ".alloc.txt")
+            with open(alloc_path, "w") as f:
+                f.write(self._allocation_report(label, before, after))
+            written.append(alloc_path)
+
+        with self._lock:
+            self.files.extend(written)
+
+    def _allocation_report(self, label: str, before: Optional[tracemalloc.Snapshot],
+                           after: tracemalloc.Snapshot) -> str:
+        # Ignore the profilers' own bookkeeping
+        filters = [tracemalloc.Filter(False, path)
+                   for path in (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__)]
+        after = after.filter_traces(filters)
+
+        lines = [f"{label}: top {self.top_n} allocation sites"]
+        if before is None:
+            lines.append("(allocations alive at the end)")
+            for stat in after.statistics("lineno")[:self.top_n]:
+                lines.append(str(stat))
+        else:
+            lines.append("(net change over the section)")
+            diff = after.compare_to(before.filter_traces(filters), "lineno")
+            for stat in diff[:self.top_n]:
+                lines.append(str(stat))
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot() -> Optional[tracemalloc.Snapshot]:
+    return tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+
+def profiler_from_env(output_dir: str = "output") -> Optional[StageProfiler]:
+    """
+    StageProfiler from MEAL_AGENT_PROFILE ("loop" / "stage"; unset, "" or
+    "0" = off) and MEAL_AGENT_PROFILE_TOP (allocation sites listed, default 20).
+    """
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if mode in ("", "0", "off"):
+        return None
+    if mode in ("1", "on"):
+        mode = "stage"
+
+    top_n = int(os.environ.get(PROFILE_TOP_ENV, "20"))
+    return StageProfiler(mode, output_dir=output_dir, top_n=top_n)
@@ -0,0 +1,126 @@
+"""
+Compact Quantity Records
+
+This module provides:
+- IngredientLine: one normalized recipe ingredient line
+- Quantity: a running base-unit total for one ingredient, with optional
+  provenance (the lines that contributed to it)
+- aggregated_to_json / missing_to_json: the dict shapes used in outputs
+Used by RecipeStore, IngredientMatrix and GroceryOptimizerAgent.
+
+Both types use __slots__ (no per-instance dict), names are interned by
+the normalizer and units are stored as integer codes (see
+utils.conversions.UNIT_NAMES). Dicts are only built at serialization.
+"""
+
+import sys
+from typing import Any, Dict, List, Optional
+from utils.conversions import UNIT_NAMES, convert_to_base, unit_code
+from utils.normalizer import normalize_name_cached
+
+
+class IngredientLine:
+    """
+    Normalized ingredient line: name, base-unit qty, unit code,
+    plus the raw qty / unit as written in the recipe.
+    """
+
+    __slots__ = ("name", "qty_norm", "unit", "qty", "raw_unit")
+
+    def __init__(self, name: str, qty_norm: float, unit: int, qty, raw_unit):
+        self.name = name
+        self.qty_norm = qty_norm
+        self.unit = unit
+        self.qty = qty
+        self.raw_unit = raw_unit
+
+    @classmethod
+    def from_ingredient(cls, ing: Dict[str, Any]) -> "IngredientLine":
+        """Line of a recipe ingredient dict ({"name", "qty", "unit"})."""
+        qty = ing.get("qty", 1)
+        raw_unit = ing.get("unit", "pcs")
+        qty_norm, unit_norm = convert_to_base(qty, raw_unit)
+        return cls(normalize_name_cached(ing["name"]), qty_norm, unit_code(unit_norm), qty, raw_unit)
+
+    @property
+    def unit_norm(self) -> str:
+        return UNIT_NAMES[self.unit]
+
+    def entry(self) -> Dict[str, Any]:
+        """Raw {"qty", "unit"} entry, as listed in aggregated provenance."""
+        return {"qty": self.qty, "unit": self.raw_unit}
+
+    # Unit codes are per process (unknown units are numbered on first
+    # use), so pickles carry the unit name instead.
+    def __getstate__(self):
+        return self.name, self.qty_norm, self.unit_norm, self.qty, self.raw_unit
+
+    def __setstate__(self, state):
+        name, self.qty_norm, unit_norm, self.qty, self.raw_unit = state
+        self.name = sys.intern(name)
+        self.unit = unit_code(unit_norm)
+
+    def __repr__(self):
+        return f"IngredientLine({self.name!r}, {self.qty_norm!r} {self.unit_norm})"
+
+
+class Quantity:
+    """
+    Base-unit amount of one ingredient.
+
+    entries is None unless provenance was requested; it then holds the
+    IngredientLines added into the total, in plan order.
+    """
+
+    __slots__ = ("qty", "unit", "entries")
+
+    def __init__(self, qty: float, unit: int, entries: Optional[List[IngredientLine]] = None):
+        self.qty = qty
+        self.unit = unit
+        self.entries = entries
+
+    @property
+    def unit_norm(self) -> str:
+        return UNIT_NAMES[self.unit]
+
+    def add(self, line: IngredientLine):
+        self.qty += line.qty_norm
+        if self.entries is not None:
+            self.entries.append(line)
+
+    def __getstate__(self):
+        return self.qty, self.unit_norm, self.entries
+
+    def __setstate__(self, state):
+        self.qty, unit_norm, self.entries = state
+        self.unit = unit_code(unit_norm)
+
+    def __eq__(self, other):
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        return self.qty == other.qty and self.unit == other.unit
+
+    def __repr__(self):
+        return f"Quantity({self.qty!r} {self.unit_norm})"
+
+
+# ----------------------------------------
+# Serialization
+# ----------------------------------------
+def aggregated_to_json(aggregated: Dict[str, Quantity]) -> Dict[str, Any]:
+    """
+    {name: {"qty_norm", "unit_norm"[, "entries"]}} — "entries" only for
+    quantities aggregated with provenance.
+    """
+    out = {}
+    for name, q in aggregated.items():
+        info = {"qty_norm": q.qty, "unit_norm": q.unit_norm}
+        if q.entries is not None:
+            info["entries"] = [line.entry() for line in q.entries]
+        out[name] = info
+    return out
+
+
+def missing_to_json(missing: Dict[str, Quantity]) -> Dict[str, Any]:
+    """{name: {"need_norm", "unit_norm"}}."""
+    return {name: {"need_norm": q.qty, "unit_norm": q.unit_norm} for name, q in missing.items()}
@@ -0,0 +1,197 @@
+"""
+Streaming Recipe Loader
+
+This module provides:
+- iter_recipes: stream recipes from a JSONL or CSV file (optionally .gz)
+- validate_recipe: check + clean one raw record
+- load_catalog: build a RecipeCatalog incrementally from a file
+
+Records are read, validated and compiled one at a time; the raw file is
+never held in memory as a list.
+
+File formats:
+    JSONL — one recipe per line, same shape as data.RECIPES_SAMPLE entries
+    CSV   — one row per ingredient line, rows of a recipe kept together:
+            recipe_id,title,category,ingredient,qty,unit
+"""
+
+import csv
+import gzip
+import json
+import math
+from itertools import groupby
+from typing import Dict, Any, Iterator, Optional
+
+from utils.catalog import RecipeCatalog
+
+CSV_FIELDS = ["recipe_id", "title", "category", "ingredient", "qty", "unit"]
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _format_of(path: str) -> str:
+    base = path[:-3] if path.endswith(".gz") else path
+    if base.endswith(".jsonl") or base.endswith(".ndjson"):
+        return "jsonl"
+    if base.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Unsupported recipe file (expected .jsonl or .csv): {path}")
+
+
+# ----------------------------------------
+# Validation
+# ----------------------------------------
+def _number(value) -> float:
+    # ValueError for non-numbers (bool included) and for nan / inf
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        number, text = value, None
+    else:
+        text = str(value).strip()
+        number = float(text)
+    if not math.isfinite(number):
+        raise ValueError(f"not a finite number: {value!r}")
+    if text is None:
+        return value
+    return int(number) if number.is_integer() and "." not in text else number
+
+
+def validate_recipe(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a cleaned recipe dict or raises ValueError.
+
+    Requires recipe_id and a list of at least one ingredient, each an
+    object with a name and a finite, non-negative qty.
+    qty defaults to 1 and unit to "pcs", as in the agents.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"recipe must be an object, got {type(raw).__name__}")
+
+    recipe_id = str(raw.get("recipe_id") or "").strip()
+    if not recipe_id:
+        raise ValueError("missing recipe_id")
+
+    raw_ingredients = raw.get("ingredients") or []
+    if not isinstance(raw_ingredients, list):
+        raise ValueError(f"recipe {recipe_id}: ingredients must be a list, "
+                         f"got {type(raw_ingredients).__name__}")
+
+    ingredients = []
+    for ing in raw_ingredients:
+        if not isinstance(ing, dict):
+            raise ValueError(f"recipe {recipe_id}: ingredient must be an object, got {ing!r}")
+        name = str(ing.get("name") or "").strip()
+        if not name:
+            raise ValueError(f"recipe {recipe_id}: ingredient without a name")
+        try:
+            qty = _number(ing.get("qty", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"recipe {recipe_id}: bad qty {ing.get('qty')!r} for {name}")
+        if qty < 0:
+            raise ValueError(f"recipe {recipe_id}: negative qty for {name}")
+
+        ingredients.append({
+            "name": name,
+            "qty": qty,
+            "unit": str(ing.get("unit") or "pcs").strip()
+        })
+
+    if not ingredients:
+        raise ValueError(f"recipe {recipe_id}: no ingredients")
+
+    return {
+        "recipe_id": recipe_id,
+        "title": str(raw.get("title") or recipe_id).strip(),
+        "ingredients": ingredients,
+        "category": str(raw.get("category") or "").strip()
+    }
+
+
+# ----------------------------------------
+# Raw record streams
+# ----------------------------------------
+def _iter_jsonl(f) -> Iterator[tuple]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+
+
+def _iter_csv(f) -> Iterator[tuple]:
+    reader = csv.DictReader(f)
+    missing = set(CSV_FIELDS) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV header missing columns: {sorted(missing)}")
+
+    rows = ((reader.line_num, row) for row in reader)
+    for recipe_id, group in groupby(rows, key=lambda x: x[1]["recipe_id"]):
+        line_no, first = next(group)
+        ingredients = [_csv_ingredient(first)]
+        ingredients.extend(_csv_ingredient(row) for _, row in group)
+        yield line_no, {
+            "recipe_id": recipe_id,
+            "title": first["title"],
+            "category": first["category"],
+            "ingredients": ingredients
+        }
+
+
+def _csv_ingredient(row: Dict[str, str]) -> Dict[str, Any]:
+    # A blank qty cell is a missing qty (validate_recipe defaults it to 1)
+    ing = {"name": row["ingredient"], "unit": row["unit"]}
+    if (row["qty"] or "").strip():
+        ing["qty"] = row["qty"]
+    return ing
+
+
+def iter_recipes(path: str, on_error: str = "raise") -> Iterator[Dict[str, Any]]:
+    """
+    Yields validated recipes from a .jsonl / .csv file (optionally .gz).
+
+    on_error: "raise" (ValueError with the line number) or "skip"
+    """
+    if on_error not in ("raise", "skip"):
+        raise ValueError(f"on_error must be 'raise' or 'skip', got {on_error!r}")
+
+    fmt = _format_of(path)
+
+    with _open_text(path) as f:
+        records = _iter_jsonl(f) if fmt == "jsonl" else _iter_csv(f)
+
+        for line_no, raw in records:
+            try:
+                if isinstance(raw, Exception):
+                    raise ValueError(f"invalid JSON: {raw}")
+                if not isinstance(raw, dict):
+                    raise ValueError("record is not an object")
+                yield validate_recipe(raw)
+            except ValueError as e:
+                if on_error == "raise":
+                    raise ValueError(f"{path}:{line_no}: {e}") from None
+
+
+def load_catalog(path: str, catalog: Optional[RecipeCatalog] = None,
+                 on_error: str = "raise") -> RecipeCatalog:
+    """
+    Streams a recipe file into a RecipeCatalog, compiling each recipe's
+    indexes as it arrives. Pass an existing catalog to extend it.
+    """
+    catalog = RecipeCatalog() if catalog is None else catalog
+
+    for recipe in iter_recipes(path, on_error=on_error):
+        if recipe["recipe_id"] in catalog.by_id:
+            if on_error == "raise":
+                raise ValueError(f"{path}: duplicate recipe_id {recipe['recipe_id']}")
+            continue
+        catalog.add(recipe)
+
+    return catalog
@@ -0,0 +1,175 @@
+"""
+Indexed Recipe Store
+
+This module provides:
+- RecipeStore: O(1) recipe lookup by id
+- secondary indexes by category and by ingredient (normalized names)
+- per-recipe normalized, base-unit ingredient lines (IngredientLine)
+- cached id / recipe listings and IngredientMatrix, invalidated on mutation
+Used by data.get_recipe, the agents and the evaluator instead of
+scanning recipe lists.
+"""
+
+from typing import Dict, Any, List, Iterable, Iterator, FrozenSet, Optional, Set, Tuple
+from utils.normalizer import normalize_name_cached
+from utils.quantities import IngredientLine
+
+
+class RecipeStore:
+    """
+    Recipes keyed by recipe_id, in insertion order.
+
+    Adding a recipe whose id already exists replaces it in place.
+    Listings (ids(), recipes, position) are built on first use and
+    dropped whenever the store changes.
+    """
+
+    def __init__(self, recipes: Iterable[Dict[str, Any]] = ()):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+
+        # recipe_id -> normalized ingredient lines / names / category
+        self.ingredient_lines: Dict[str, Tuple[IngredientLine, ...]] = {}
+        self.ingredient_names: Dict[str, FrozenSet[str]] = {}
+        self.categories: Dict[str, str] = {}
+
+        # normalized ingredient -> recipe ids, normalized category -> recipe ids
+        self.ingredient_index: Dict[str, Set[str]] = {}
+        self.category_index: Dict[str, Set[str]] = {}
+
+        self._ids: Optional[Tuple[str, ...]] = None
+        self._recipes: Optional[List[Dict[str, Any]]] = None
+        self._position: Optional[Dict[str, int]] = None
+
+        # IngredientMatrix of the store (utils/ingredient_matrix.store_matrix),
+        # dropped whenever the store changes
+        self.matrix = None
+
+        for recipe in recipes:
+            self.add(recipe)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, recipe_id) -> bool:
+        return recipe_id in self.by_id
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.by_id.values())
+
+    # ----------------------------------------
+    # Mutation
+    # ----------------------------------------
+    def add(self, recipe: Dict[str, Any]):
+        """Insert (or replace) a recipe and index it."""
+        recipe_id = recipe["recipe_id"]
+        if recipe_id in self.by_id:
+            self._unindex(recipe_id)
+
+        self.by_id[recipe_id] = recipe
+        self._index(recipe)
+        self._invalidate()
+
+    def remove(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a recipe; returns it, or None if unknown."""
+        if recipe_id not in self.by_id:
+            return None
+
+        self._unindex(recipe_id)
+        recipe = self.by_id.pop(recipe_id)
+        self._invalidate()
+        return recipe
+
+    def _index(self, recipe: Dict[str, Any]):
+        recipe_id = recipe["recipe_id"]
+
+        lines = tuple(IngredientLine.from_ingredient(ing) for ing in recipe.get("ingredients", []))
+
+        names = frozenset(line.name for line in lines)
+        category = normalize_name_cached(recipe.get("category", ""))
+
+        self.ingredient_lines[recipe_id] = lines
+        self.ingredient_names[recipe_id] = names
+        self.categories[recipe_id] = category
+
+        for name in names:
+            self.ingredient_index.setdefault(name, set()).add(recipe_id)
+        self.category_index.setdefault(category, set()).add(recipe_id)
+
+    def _unindex(self, recipe_id: str):
+        for name in self.ingredient_names.pop(recipe_id):
+            ids = self.ingredient_index[name]
+            ids.discard(recipe_id)
+            if not ids:
+                del self.ingredient_index[name]
+
+        category = self.categories.pop(recipe_id)
+        ids = self.category_index[category]
+        ids.discard(recipe_id)
+        if not ids:
+            del self.category_index[category]
+
+        del self.ingredient_lines[recipe_id]
+
+    def _invalidate(self):
+        self._ids = None
+        self._recipes = None
+        self._position = None
+        self.matrix = None
+
+    def __getstate__(self):
+        # The matrix (NumPy arrays) is rebuilt on first use after unpickling
+        return dict(self.__dict__, matrix=None)
+
+    # ----------------------------------------
+    # Queries
+    # ----------------------------------------
+    def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(recipe_id)
+
+    def meal_lines(self, meal: Dict[str, Any]) -> Optional[Tuple[IngredientLine, ...]]:
+        """
+        Stored lines of a plan meal, or None when its recipe_id is unknown
+        or its ingredients differ from the stored recipe's (edited meal:
+        check the meal itself).
+        """
+        recipe = self.by_id.get(meal.get("recipe_id"))
+        if recipe is None:
+            return None
+        ingredients = meal.get("ingredients")
+        if ingredients is not None and ingredients != recipe["ingredients"]:
+            return None
+        return self.ingredient_lines[recipe["recipe_id"]]
+
+    def ids(self) -> Tuple[str, ...]:
+        """All recipe ids in insertion order (cached)."""
+        if self._ids is None:
+            self._ids = tuple(self.by_id)
+        return self._ids
+
+    @property
+    def recipes(self) -> List[Dict[str, Any]]:
+        """All recipes in insertion order (cached; do not mutate)."""
+        if self._recipes is None:
+            self._recipes = list(self.by_id.values())
+        return self._recipes
+
+    @property
+    def position(self) -> Dict[str, int]:
+        """recipe_id -> index in recipes (cached)."""
+        if self._position is None:
+            self._position = {rid: i for i, rid in enumerate(self.by_id)}
+        return self._position
+
+    def by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Recipes of a category, in insertion order."""
+        ids = self.category_index.get(normalize_name_cached(category), ())
+        return self._ordered(ids)
+
+    def by_ingredient(self, name: str) -> List[Dict[str, Any]]:
+        """Recipes using an ingredient, in insertion order."""
+        ids = self.ingredient_index.get(normalize_name_cached(name), ())
+        return self._ordered(ids)
+
+    def _ordered(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        position = self.position
+        return [self.by_id[rid] for rid in sorted(ids, key=position.__getitem__)]
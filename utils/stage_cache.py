@@ -0,0 +1,51 @@
+"""
+Orchestrator Stage Cache
+
+This module provides:
+- fingerprint: stable hash of a stage input (pantry, plan, profile)
+- StageCache: remembers each stage's last input key and output so
+  the orchestrator can skip stages whose inputs did not change
+Used by app.plan_for_user.
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict
+
+
+def fingerprint(obj: Any) -> str:
+    """Stable content hash of a JSON-like object."""
+    raw = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class StageCache:
+    """
+    Last input key + output per stage.
+
+    A stage is re-run only when its key differs from the previous call.
+    Counters per stage:
+        hits — stage skipped, previous output reused
+        runs — stage executed
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def run(self, stage: str, key: Any, compute: Callable[[], Any]) -> Any:
+        stats = self.stats.setdefault(stage, {"hits": 0, "runs": 0})
+        entry = self._entries.get(stage)
+
+        if entry is not None and entry[0] == key:
+            stats["hits"] += 1
+            return entry[1]
+
+        value = compute()
+        self._entries[stage] = (key, value)
+        stats["runs"] += 1
+        return value
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Copy of the counters, for traces."""
+        return {stage: dict(counts) for stage, counts in self.stats.items()}